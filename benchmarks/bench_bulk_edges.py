@@ -0,0 +1,52 @@
+"""Benchmark for adding stage-to-stage dependencies to a Dagman
+
+Compares adding every node of one stage as a parent of every node of the
+next stage with per-node ``add_parents`` calls against the bulk
+``Dagman.connect`` and ``Dagman.add_edges`` methods.
+
+Usage::
+
+    python benchmarks/bench_bulk_edges.py
+"""
+from __future__ import print_function
+import time
+
+from pycondor import Dagman, Job
+
+N_PARENTS = 10000
+N_CHILDREN = 50
+
+
+def make_stages(label):
+    dag = Dagman('bulk_edges_{}'.format(label))
+    parents = [Job('{}_parent_{}'.format(label, i), 'parent.py', dag=dag)
+               for i in range(N_PARENTS)]
+    children = [Job('{}_child_{}'.format(label, i), 'child.py', dag=dag)
+                for i in range(N_CHILDREN)]
+    return dag, parents, children
+
+
+def per_node(dag, parents, children):
+    for child in children:
+        child.add_parents(parents)
+
+
+def connect(dag, parents, children):
+    dag.connect(parents, children)
+
+
+def add_edges(dag, parents, children):
+    dag.add_edges((parent, child) for child in children for parent in parents)
+
+
+if __name__ == '__main__':
+    print('{} parents x {} children = {} edges'.format(
+        N_PARENTS, N_CHILDREN, N_PARENTS * N_CHILDREN))
+    print('{:>12} {:>12}'.format('method', 'seconds'))
+    for method in [per_node, connect, add_edges]:
+        dag, parents, children = make_stages(method.__name__)
+        start = time.perf_counter()
+        method(dag, parents, children)
+        seconds = time.perf_counter() - start
+        assert all(len(child.parents) == N_PARENTS for child in children)
+        print('{:>12} {:>12.3f}'.format(method.__name__, seconds))
@@ -0,0 +1,50 @@
+"""Memory benchmark for writing the DAG file of a Job with many arguments
+
+Builds a Dagman containing a single Job with N arguments (default 1,000,000)
+and a child Job, and reports the peak memory allocated during
+``Dagman.build`` (measured with ``tracemalloc``) next to the size of the
+resulting DAG file.
+
+Usage::
+
+    python benchmarks/bench_dag_memory.py [N]
+"""
+from __future__ import print_function
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pycondor import Dagman, Job
+
+
+def bench(n_args, submit_dir):
+    dag = Dagman('dag_memory', submit=submit_dir)
+    job = Job('job', 'job.py', submit=submit_dir, dag=dag)
+    job.add_args(str(i) for i in range(n_args))
+    child = Job('child', 'child.py', submit=submit_dir, dag=dag)
+    child.add_parent(job)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    dag.build(fancyname=False)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return os.path.getsize(dag.submit_file), peak, seconds
+
+
+if __name__ == '__main__':
+    n_args = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    submit_dir = tempfile.mkdtemp()
+    try:
+        size, peak, seconds = bench(n_args, submit_dir)
+    finally:
+        shutil.rmtree(submit_dir)
+    print('{:<28} {}'.format('Job arguments', n_args))
+    print('{:<28} {:.1f}'.format('DAG file size (MB)', size / 1e6))
+    print('{:<28} {:.1f}'.format('Peak build memory (MB)', peak / 1e6))
+    print('{:<28} {:.1f}'.format('Build time (s, traced)', seconds))
@@ -0,0 +1,54 @@
+"""Scaling benchmark for adding parent/child relationships between nodes
+
+Times ``BaseNode.add_parent`` for a fan-in (many parents, one child) and a
+complete bipartite (N parents x N children) graph. With constant-time
+membership tests the time per edge should stay flat as the number of edges
+grows.
+
+Usage::
+
+    python benchmarks/bench_edges.py
+"""
+from __future__ import print_function
+import time
+
+from pycondor.basenode import BaseNode
+
+
+def make_nodes(prefix, n):
+    return [BaseNode('{}_{}'.format(prefix, i)) for i in range(n)]
+
+
+def bench_fan_in(n_parents):
+    parents = make_nodes('fan_in_parent_{}'.format(n_parents), n_parents)
+    child = BaseNode('fan_in_child_{}'.format(n_parents))
+    start = time.perf_counter()
+    for parent in parents:
+        child.add_parent(parent)
+    return n_parents, time.perf_counter() - start
+
+
+def bench_bipartite(n):
+    parents = make_nodes('bipartite_parent_{}'.format(n), n)
+    children = make_nodes('bipartite_child_{}'.format(n), n)
+    start = time.perf_counter()
+    for child in children:
+        for parent in parents:
+            child.add_parent(parent)
+    return n * n, time.perf_counter() - start
+
+
+def report(title, results):
+    print(title)
+    print('{:>12} {:>12} {:>14}'.format('edges', 'seconds', 'us / edge'))
+    for n_edges, seconds in results:
+        print('{:>12} {:>12.3f} {:>14.3f}'.format(
+            n_edges, seconds, 1e6 * seconds / n_edges))
+    print()
+
+
+if __name__ == '__main__':
+    report('Fan-in (N parents -> 1 child)',
+           [bench_fan_in(n) for n in (1000, 10000, 100000)])
+    report('Complete bipartite (N parents -> N children)',
+           [bench_bipartite(n) for n in (10, 100, 316, 1000)])
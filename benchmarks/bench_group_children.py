@@ -0,0 +1,49 @@
+"""Benchmark for writing many children that share the same parents
+
+Builds a Dagman where a parent Job with N_PARENT_ARGS arguments (i.e.
+N_PARENT_ARGS DAG nodes) is the parent of N_CHILDREN Jobs, and compares the
+DAG file size and build time with and without ``group_children=True``.
+
+Usage::
+
+    python benchmarks/bench_group_children.py
+"""
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import time
+
+from pycondor import Dagman, Job
+
+N_PARENT_ARGS = 2000
+N_CHILDREN = 1000
+
+
+def build(submit_dir, **build_kwargs):
+    dag = Dagman('group_children', submit=submit_dir)
+    parent = Job('parent', 'parent.py', submit=submit_dir, dag=dag)
+    parent.add_args(str(i) for i in range(N_PARENT_ARGS))
+    children = [Job('child_{}'.format(i), 'child.py', submit=submit_dir,
+                    dag=dag) for i in range(N_CHILDREN)]
+    dag.connect(parent, children)
+
+    start = time.perf_counter()
+    dag.build(fancyname=False, **build_kwargs)
+    seconds = time.perf_counter() - start
+
+    return os.path.getsize(dag.submit_file), seconds
+
+
+if __name__ == '__main__':
+    print('{} parent nodes x {} children'.format(N_PARENT_ARGS, N_CHILDREN))
+    print('{:>16} {:>16} {:>12}'.format('group_children', 'DAG file (MB)',
+                                        'seconds'))
+    for group_children in [False, True]:
+        submit_dir = tempfile.mkdtemp()
+        try:
+            size, seconds = build(submit_dir, group_children=group_children)
+        finally:
+            shutil.rmtree(submit_dir)
+        print('{:>16} {:>16.2f} {:>12.3f}'.format(str(group_children),
+                                                  size / 1e6, seconds))
@@ -0,0 +1,41 @@
+"""Benchmark for building a Dagman with many Jobs using worker threads
+
+Builds a Dagman with N Jobs (default 2,000), each with its own submit file,
+once for each number of workers, and reports the time taken by
+``Dagman.build``. Pass a directory to build into, for example one on a
+network filesystem, to see the effect of file system latency.
+
+Usage::
+
+    python benchmarks/bench_parallel_build.py [N] [submit_dir]
+"""
+from __future__ import print_function
+import shutil
+import sys
+import tempfile
+import time
+
+from pycondor import Dagman, Job
+
+
+def bench(n_jobs, submit_dir, workers):
+    dag = Dagman('parallel_build', submit=submit_dir)
+    for i in range(n_jobs):
+        Job('job_{}'.format(i), 'job.py', submit=submit_dir, dag=dag)
+
+    start = time.perf_counter()
+    dag.build(workers=workers)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    parent_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    print('{:<10} {:>10}'.format('workers', 'time (s)'))
+    for workers in [None, 2, 4, 8, 16]:
+        submit_dir = tempfile.mkdtemp(dir=parent_dir)
+        try:
+            seconds = bench(n_jobs, submit_dir, workers)
+        finally:
+            shutil.rmtree(submit_dir)
+        print('{:<10} {:>10.2f}'.format(str(workers), seconds))
@@ -0,0 +1,67 @@
+"""Benchmark for saving and loading Dagman graphs
+
+Creates a Dagman with N Jobs (default 100,000) in 100 stages, each Job with
+a few arguments and every Job in a stage depending on a merge Job of the
+previous stage, then compares the time to create the graph with the time to
+save it with ``Dagman.save`` and load it with ``Dagman.load``.
+
+Usage::
+
+    python benchmarks/bench_save_load.py [N]
+"""
+from __future__ import print_function
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from pycondor import Dagman, Job
+
+
+def make_dagman(n_jobs, n_stages=100):
+    dag = Dagman('save_load', submit='submit')
+    merge = None
+    per_stage = n_jobs // n_stages
+    for stage in range(n_stages):
+        jobs = [Job('job_{}_{}'.format(stage, i), 'job.py', submit='submit',
+                    log='log', request_memory='2GB', dag=dag)
+                for i in range(per_stage)]
+        for job in jobs:
+            job.add_args(['--seed {}'.format(seed) for seed in range(3)])
+        if merge is not None:
+            dag.connect(merge, jobs)
+        merge = Job('merge_{}'.format(stage), 'merge.py', submit='submit',
+                    dag=dag)
+        dag.connect(jobs, merge)
+    return dag
+
+
+if __name__ == '__main__':
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, 'dagman.pkl')
+    try:
+        start = time.perf_counter()
+        dag = make_dagman(n_jobs)
+        create = time.perf_counter() - start
+
+        gc.collect()
+        start = time.perf_counter()
+        dag.save(path)
+        save = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        del dag
+        gc.collect()
+        start = time.perf_counter()
+        Dagman.load(path)
+        load = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp_dir)
+    print('{:<20} {}'.format('Jobs', n_jobs))
+    print('{:<20} {:.2f}'.format('Create (s)', create))
+    print('{:<20} {:.2f}'.format('Save (s)', save))
+    print('{:<20} {:.2f}'.format('Load (s)', load))
+    print('{:<20} {:.1f}'.format('File size (MB)', size / 1e6))
@@ -1,6 +1,8 @@
 
 from .job import Job
 from .dagman import Dagman
+from .backends import FileBackend, MemoryBackend
+from .submit import submit_jobs, SubmitResult
 from .visualize import visualize
 from . import utils
 
@@ -0,0 +1,155 @@
+"""Output backends for building Jobs and Dagmans
+
+Building goes through a backend for every filesystem operation: checking
+(and creating) directories, listing submit directories for fancy names,
+reserving submit files, and reading and writing files. ``FileBackend``, the
+default, uses the local filesystem, while ``MemoryBackend`` keeps everything
+in memory, which is useful for dry runs, testing and benchmarking rendering
+without any I/O. Any object with the same methods can be used as a backend.
+"""
+import io
+import os
+import threading
+from collections import namedtuple
+
+from . import utils
+
+FileStat = namedtuple('FileStat', ['st_size', 'st_mtime_ns'])
+
+
+class FileBackend(object):
+    """Backend that builds to the local filesystem
+
+    .. versionadded:: 0.7.0
+    """
+
+    def checkdir(self, path, makedirs):
+        """Checks that the directory of path exists
+
+        Parameters
+        ----------
+        path : str
+            File path.
+        makedirs : bool
+            Whether to create the directory if it doesn't exist. Otherwise,
+            an ``IOError`` is raised.
+        """
+        utils.checkdir(path, makedirs)
+
+    def listdir(self, directory):
+        """Returns the names of the files in directory"""
+        return os.listdir(directory)
+
+    def create(self, path):
+        """Atomically creates an empty file at path, unless it exists
+
+        Returns
+        -------
+        created : bool
+            Whether or not the file was created by this call.
+        """
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    def open(self, path, mode='r', buffering=-1):
+        """Opens path for reading (``'r'``) or writing (``'w'``)"""
+        return open(path, mode, buffering=buffering)
+
+    def stat(self, path):
+        """Returns the size and modification time of path
+
+        Raises ``OSError`` if path doesn't exist.
+        """
+        return os.stat(path)
+
+
+class _MemoryFile(io.StringIO):
+    # File object that stores its contents in a MemoryBackend when closed
+
+    def __init__(self, backend, path):
+        super(_MemoryFile, self).__init__()
+        self._backend = backend
+        self._path = path
+
+    def close(self):
+        if not self.closed:
+            self._backend._store(self._path, self.getvalue())
+        super(_MemoryFile, self).close()
+
+
+class MemoryBackend(object):
+    """Backend that builds to memory, without touching the filesystem
+
+    Files are stored in the ``files`` attribute, a ``dict`` mapping the
+    absolute path of each file to its contents. Directories always exist.
+
+    .. versionadded:: 0.7.0
+
+    Attributes
+    ----------
+    files : dict
+        Maps the absolute path of each file written to its contents.
+
+    Examples
+    --------
+    >>> import pycondor
+    >>> dag = pycondor.Dagman('mydag', submit='/path/to/submit')
+    >>> job = pycondor.Job('myjob', 'myscript.py', dag=dag)
+    >>> backend = pycondor.MemoryBackend()
+    >>> dag.build(fancyname=False, backend=backend)
+    >>> sorted(backend.files)
+    ['/path/to/submit/mydag.submit', '/path/to/submit/myjob.submit']
+    """
+
+    def __init__(self):
+        self.files = {}
+        self._mtimes = {}
+        self._n_writes = 0
+        self._lock = threading.Lock()
+
+    def _store(self, path, contents):
+        with self._lock:
+            self._n_writes += 1
+            self.files[path] = contents
+            self._mtimes[path] = self._n_writes
+
+    def checkdir(self, path, makedirs):
+        return
+
+    def listdir(self, directory):
+        directory = os.path.abspath(directory)
+        with self._lock:
+            paths = list(self.files)
+        return [os.path.basename(path) for path in paths
+                if os.path.dirname(path) == directory]
+
+    def create(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self.files:
+                return False
+            self._n_writes += 1
+            self.files[path] = ''
+            self._mtimes[path] = self._n_writes
+        return True
+
+    def open(self, path, mode='r', buffering=-1):
+        path = os.path.abspath(path)
+        if mode == 'w':
+            return _MemoryFile(self, path)
+        with self._lock:
+            if path not in self.files:
+                raise FileNotFoundError(path)
+            return io.StringIO(self.files[path])
+
+    def stat(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self.files:
+                raise FileNotFoundError(path)
+            return FileStat(len(self.files[path].encode('utf-8')),
+                            self._mtimes[path])
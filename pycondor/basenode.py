@@ -1,9 +1,433 @@
 
 import os
 import time
-import glob
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from . import utils
+from .backends import FileBackend
+
+
+class NodeList(list):
+    """List of nodes with constant-time membership tests
+
+    Behaves like a regular ``list`` (iteration and indexing follow insertion
+    order), but keeps a set of its items alongside so that ``in`` checks and
+    appends are O(1). Appending a node that is already present is a no-op.
+
+    Parameters
+    ----------
+    nodes : iterable, optional
+        Nodes to initialize the list with (default is empty).
+    """
+    def __init__(self, nodes=()):
+        super(NodeList, self).__init__()
+        self._members = set()
+        self.extend(nodes)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def __contains__(self, node):
+        try:
+            return node in self._members
+        except TypeError:
+            # Unhashable objects can't be nodes
+            return False
+
+    def __setitem__(self, index, value):
+        super(NodeList, self).__setitem__(index, value)
+        self._members = set(self)
+
+    def __delitem__(self, index):
+        super(NodeList, self).__delitem__(index)
+        self._members = set(self)
+
+    def __iadd__(self, nodes):
+        self.extend(nodes)
+        return self
+
+    def append(self, node):
+        if node in self._members:
+            return
+        self._members.add(node)
+        super(NodeList, self).append(node)
+
+    def extend(self, nodes):
+        for node in nodes:
+            self.append(node)
+
+    def insert(self, index, node):
+        if node in self._members:
+            return
+        self._members.add(node)
+        super(NodeList, self).insert(index, node)
+
+    def remove(self, node):
+        super(NodeList, self).remove(node)
+        self._members.discard(node)
+
+    def pop(self, index=-1):
+        node = super(NodeList, self).pop(index)
+        self._members.discard(node)
+        return node
+
+    def clear(self):
+        super(NodeList, self).clear()
+        self._members.clear()
+
+    def copy(self):
+        return self.__class__(self)
+
+    def _extend_new(self, nodes):
+        # Assumes nodes are unique and not already in the list
+        self._members.update(nodes)
+        super(NodeList, self).extend(nodes)
+
+    @classmethod
+    def _from_unique(cls, nodes):
+        # Creates a NodeList from a list of nodes, assuming they are unique
+        node_list = super(NodeList, cls).__new__(cls)
+        list.extend(node_list, nodes)
+        node_list._members = set(nodes)
+        return node_list
+
+
+# Name and format version of the file, in each submit directory, that holds
+# the content hashes of the files written by incremental builds
+_MANIFEST_FILENAME = '.pycondor_manifest.json'
+_MANIFEST_VERSION = 1
+
+
+class _HashWriter(object):
+    """File-like object that hashes everything written to it"""
+    def __init__(self):
+        self._hash = hashlib.sha256()
+
+    def write(self, s):
+        self._hash.update(s.encode('utf-8'))
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class _BuildManifest(object):
+    """Content hashes of the files written by previous builds
+
+    There is one manifest per directory, stored in a
+    ``.pycondor_manifest.json`` file, mapping each file name to the SHA-256
+    hash of the contents written to it along with the file's size and
+    modification time just after it was written. A file is only considered
+    unchanged if all three still match, so files that were edited or removed
+    since the last build get rewritten.
+
+    Parameters
+    ----------
+    backend : FileBackend or MemoryBackend, optional
+        Backend the manifests and files are read from and written to (default
+        is a ``FileBackend``).
+    """
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else FileBackend()
+        self._manifests = {}
+        self._modified = set()
+        self._lock = threading.Lock()
+
+    def _get_manifest(self, directory):
+        # Must be called with self._lock held
+        if directory not in self._manifests:
+            path = os.path.join(directory, _MANIFEST_FILENAME)
+            try:
+                with self.backend.open(path, 'r') as f:
+                    data = json.load(f)
+                manifest = data['files']
+                if data['version'] != _MANIFEST_VERSION:
+                    manifest = {}
+            except (IOError, OSError, ValueError, KeyError, TypeError):
+                # Missing or unreadable manifest, rewrite everything
+                manifest = {}
+            self._manifests[directory] = manifest
+        return self._manifests[directory]
+
+    def is_unchanged(self, path, digest):
+        """Checks whether path already has contents with hash digest"""
+        directory, filename = os.path.split(os.path.abspath(path))
+        with self._lock:
+            entry = self._get_manifest(directory).get(filename)
+        if not isinstance(entry, dict) or entry.get('sha256') != digest:
+            return False
+        try:
+            stat = self.backend.stat(path)
+        except OSError:
+            return False
+        return (stat.st_size == entry.get('size')
+                and stat.st_mtime_ns == entry.get('mtime_ns'))
+
+    def record(self, path, digest):
+        """Records that contents with hash digest were written to path"""
+        stat = self.backend.stat(path)
+        directory, filename = os.path.split(os.path.abspath(path))
+        entry = {'sha256': digest,
+                 'size': stat.st_size,
+                 'mtime_ns': stat.st_mtime_ns}
+        with self._lock:
+            self._get_manifest(directory)[filename] = entry
+            self._modified.add(directory)
+
+    def save(self):
+        """Writes the manifests of all directories with new entries"""
+        with self._lock:
+            for directory in sorted(self._modified):
+                path = os.path.join(directory, _MANIFEST_FILENAME)
+                with self.backend.open(path, 'w') as f:
+                    json.dump({'version': _MANIFEST_VERSION,
+                               'files': self._manifests[directory]},
+                              f, indent=1, sort_keys=True)
+            self._modified.clear()
+
+
+class _FancynameAllocator(object):
+    """Hands out dated, numbered submit names, e.g. ``name_YYYYMMDD_NN``
+
+    Each submit directory is listed once, the first time a name in it is
+    requested, to find the highest number already used today for each node
+    name. Names are then handed out from this in-memory index, so requesting
+    many names costs a single directory listing rather than one per name.
+
+    Every name handed out is reserved by exclusively creating its (empty)
+    submit file. This is atomic, also across processes and hosts sharing the
+    submit directory, so builds running at the same time never get the same
+    name. If another build reserved a name first, the next number is tried.
+
+    Parameters
+    ----------
+    date : str, optional
+        Date to use in names, formatted as ``YYYYMMDD`` (default is today).
+    backend : FileBackend or MemoryBackend, optional
+        Backend the submit directories are listed and reserved in (default is
+        a ``FileBackend``).
+    """
+    def __init__(self, date=None, backend=None):
+        self.date = date if date is not None else time.strftime('%Y%m%d')
+        self.backend = backend if backend is not None else FileBackend()
+        self._highest = {}
+        self._lock = threading.Lock()
+
+    def _scan(self, directory):
+        # Finds the highest number used today for each name in directory
+        highest = {}
+        separator = '_{}_'.format(self.date)
+        for filename in self.backend.listdir(directory):
+            if not filename.endswith('.submit'):
+                continue
+            name, sep, number = filename[:-len('.submit')].rpartition(
+                separator)
+            if not sep or not number.isdigit():
+                continue
+            highest[name] = max(highest.get(name, 0), int(number))
+        return highest
+
+    def _next_name(self, directory, name):
+        # Must be called with self._lock held. Hands out the next number for
+        # name, returning the fancy name and the path of its submit file.
+        if directory not in self._highest:
+            self._highest[directory] = self._scan(directory)
+        highest = self._highest[directory]
+        number = highest.get(name, 0) + 1
+        highest[name] = number
+        fancyname = '{}_{}_{:02d}'.format(name, self.date, number)
+        return fancyname, os.path.join(directory,
+                                       '{}.submit'.format(fancyname))
+
+    def get_name(self, submit, name):
+        """Reserves the next unused name for name in the submit directory
+
+        The submit directory must already exist.
+        """
+        directory = os.path.abspath(submit)
+        while True:
+            with self._lock:
+                fancyname, submit_file = self._next_name(directory, name)
+            if self.backend.create(submit_file):
+                return fancyname
+
+    def get_names(self, items, map_func=map):
+        """Reserves the next unused name for each (submit, name) in items
+
+        Numbers are handed out for all items first, and the submit files are
+        then created with ``map_func`` (for example in a thread pool), so the
+        file creations don't have to happen one after another. Names another
+        build reserved first are replaced by the next unused number.
+
+        Returns
+        -------
+        fancynames : list of str
+            Reserved names, in the same order as items.
+        """
+        items = [(os.path.abspath(submit), name) for submit, name in items]
+        with self._lock:
+            names = [self._next_name(directory, name)
+                     for directory, name in items]
+        created = map_func(self.backend.create,
+                           [submit_file for _, submit_file in names])
+        fancynames = []
+        for (directory, name), (fancyname, _), ok in zip(items, names,
+                                                         created):
+            if not ok:
+                fancyname = self.get_name(directory, name)
+            fancynames.append(fancyname)
+        return fancynames
+
+
+class _BuildContext(object):
+    """State shared by all the nodes in a single build
+
+    Parameters
+    ----------
+    makedirs : bool, optional
+        Whether or not to create missing directories (default is ``True``).
+    fancyname : bool, optional
+        Whether or not to use dated, numbered submit names (default is
+        ``True``).
+    workers : int or None, optional
+        Number of threads to use in ``map``. ``None`` or 1 means no threads
+        are used (default is ``None``).
+    incremental : bool, optional
+        Whether or not ``write_file`` should skip files whose contents haven't
+        changed since they were last written (default is ``False``).
+    backend : FileBackend or MemoryBackend, optional
+        Backend all files are written to (default is a ``FileBackend``).
+    **options
+        Additional build options, available in ``options``.
+    """
+    def __init__(self, makedirs=True, fancyname=True, workers=None,
+                 incremental=False, backend=None, **options):
+        if workers is not None and (not isinstance(workers, int)
+                                    or workers < 1):
+            raise ValueError('workers must be a positive int')
+        self.backend = backend if backend is not None else FileBackend()
+        self.makedirs = makedirs
+        self.fancyname = fancyname
+        self.workers = workers
+        self.options = options
+        self.submit_names = {}
+        # Rendered submit descriptions of Jobs, when not written to files
+        self.submit_descriptions = {}
+        self.manifest = (_BuildManifest(self.backend) if incremental
+                         else None)
+        self.n_written = 0
+        self.n_reused = 0
+        self.n_dir_checks_saved = 0
+        self._checked_dirs = set()
+        self._fancynames = _FancynameAllocator(backend=self.backend)
+        self._lock = threading.Lock()
+
+    def get_submit_name(self, node):
+        """Gets the submit name for node
+
+        With fancyname, names are reserved as they are handed out, so nodes
+        with the same name in the same submit directory get different numbers,
+        both within this build and across builds running at the same time.
+        """
+        if not self.fancyname:
+            return node.name
+        # Reserving a name creates its submit file
+        self.checkdir(node.submit + '/')
+        return self._fancynames.get_name(node.submit, node.name)
+
+    def get_submit_names(self, nodes):
+        """Gets the submit names for nodes, in the same order
+
+        Like ``get_submit_name``, but with fancyname the names are reserved
+        using the workers of the build.
+        """
+        if not self.fancyname:
+            return [node.name for node in nodes]
+        for node in nodes:
+            self.checkdir(node.submit + '/')
+        return self._fancynames.get_names(
+            [(node.submit, node.name) for node in nodes], self.map)
+
+    def map(self, func, items, workers=None):
+        """Calls func on each of items, in a thread pool if using workers
+
+        If given, workers is used instead of the number of workers of the
+        build.
+
+        Returns
+        -------
+        results : list
+            Results of func for each item, in the same order as items. The
+            first exception raised by func, if any, is re-raised.
+        """
+        if workers is None:
+            workers = self.workers
+        if not workers or workers == 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items))
+
+    def checkdir(self, path):
+        """Checks that the directory of path exists, at most once per build
+
+        Like the backend's ``checkdir``, but directories that were already
+        checked (or created) earlier in the build aren't checked again, which
+        saves a ``stat`` call, i.e. a round trip on network filesystems, for
+        every node sharing the same directories.
+        """
+        outdir = os.path.dirname(path)
+        with self._lock:
+            if outdir in self._checked_dirs:
+                self.n_dir_checks_saved += 1
+                return
+        self.backend.checkdir(path, self.makedirs)
+        with self._lock:
+            self._checked_dirs.add(outdir)
+
+    def write_file(self, path, write, buffering=-1):
+        """Writes a file, unless unchanged since the last incremental build
+
+        Parameters
+        ----------
+        path : str
+            Path of the file to write.
+        write : callable
+            Function that writes the file contents to the file object it is
+            passed. For incremental builds it is called twice when the file
+            has changed, once to hash the contents and once to write them.
+        buffering : int, optional
+            Buffering policy passed to ``open`` (default is -1).
+
+        Returns
+        -------
+        written : bool
+            Whether or not the file was written.
+        """
+        digest = None
+        if self.manifest is not None:
+            hash_writer = _HashWriter()
+            write(hash_writer)
+            digest = hash_writer.hexdigest()
+            if self.manifest.is_unchanged(path, digest):
+                with self._lock:
+                    self.n_reused += 1
+                return False
+
+        with self.backend.open(path, 'w', buffering=buffering) as f:
+            write(f)
+        if digest is not None:
+            self.manifest.record(path, digest)
+        with self._lock:
+            self.n_written += 1
+        return True
+
+    def save_manifest(self):
+        """Saves the manifest of an incremental build"""
+        if self.manifest is not None:
+            self.manifest.save()
 
 
 class BaseNode(object):
@@ -29,22 +453,52 @@ class BaseNode(object):
         if dag is not None:
             dag._add_node(self)
         self._built = False
-
-        self.parents = []
-        self.children = []
-
-        # Set up logger
-        self.logger = utils._setup_logger(self, verbose)
-
-    def _get_fancyname(self):
-
-        date = time.strftime('%Y%m%d')
-        file_pattern = os.path.join(self.submit,
-                                    '{}_{}_??.submit'.format(self.name, date))
-        submit_number = len(glob.glob(file_pattern)) + 1
-        fancyname = self.name + '_{}_{:02d}'.format(date, submit_number)
-
-        return fancyname
+        # Result of the last submission of this node
+        self.submit_result = None
+
+        self.parents = NodeList()
+        self.children = NodeList()
+
+        # Set up logger. Note that the logger itself is only created when
+        # first needed, as setting the level of a new logger touches every
+        # existing logger and makes creating many nodes quadratic.
+        if verbose not in utils.logging_level_dict:
+            raise KeyError('Verbose option {} for {} not valid. '
+                           'Valid options are {}.'.format(
+                               verbose, self.name,
+                               utils.logging_level_dict.keys()))
+        self._verbose = verbose
+        self._logger = None
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            self._logger = utils._setup_logger(self, self._verbose)
+        return self._logger
+
+    @logger.setter
+    def logger(self, logger):
+        self._logger = logger
+
+    def _set_submit_result(self, result, command):
+        # Stores and reports the SubmitResult of submitting this node
+        self.submit_result = result
+        print(result.stdout)
+        if result.returncode != 0:
+            self.logger.error('{} failed with exit code {}: {}'.format(
+                command, result.returncode, result.stderr.strip()))
+        return result
+
+    def _debug(self, message, *args):
+        """Logs a debug message
+
+        The message is only formatted with ``args`` (and the logger only
+        created) if debug messages are enabled for this node.
+        """
+        if self._logger is None and self._verbose < 2:
+            return
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message.format(*args))
 
     def _hasparent(self, node):
         return node in self.parents
@@ -74,13 +528,11 @@ class BaseNode(object):
         if self._hasparent(node):
             return self
 
-        # Add node to existing parents
-        self.parents.append(node)
-        self.logger.debug(
-            'Added {} as a parent for {}'.format(node.name, self.name))
-
-        # Add self instance as a child to the new parent node
-        node.add_child(self)
+        # Add node to existing parents and self instance as a child to the
+        # new parent node
+        _add_edge(node, self)
+        self._debug('Added {} as a parent for {}', node.name, self.name)
+        node._debug('Added {} as a child for {}', self.name, node.name)
 
         return self
 
@@ -139,12 +591,11 @@ class BaseNode(object):
         if self._haschild(node):
             return self
 
-        # Add node to existing children
-        self.children.append(node)
-        self.logger.debug(
-            'Added {} as a child for {}'.format(node.name, self.name))
-        # Add this BaseNode instance as a parent to the new child node
-        node.add_parent(self)
+        # Add node to existing children and this BaseNode instance as a
+        # parent to the new child node
+        _add_edge(self, node)
+        self._debug('Added {} as a child for {}', node.name, self.name)
+        node._debug('Added {} as a parent for {}', self.name, node.name)
 
         return self
 
@@ -196,3 +647,76 @@ class BaseNode(object):
 
         """
         return bool(self.parents)
+
+
+def _add_edge(parent, child):
+    """Adds a parent/child relationship between two nodes
+
+    Both adjacency lists are updated directly, without going through the
+    validation and logging in ``add_parent``/``add_child``.
+
+    Returns
+    -------
+    added : bool
+        Whether or not the edge was new.
+    """
+    if parent in child.parents:
+        return False
+    child.parents.append(parent)
+    parent.children.append(child)
+    return True
+
+
+def _add_edge_pairs(edges):
+    """Adds a parent/child relationship for each (parent, child) pair
+
+    Like ``_add_edge``, but edges are grouped by child and parent so that
+    membership tests and insertions are done in bulk.
+
+    Returns
+    -------
+    n_added : int
+        Number of new edges.
+    """
+    parents_of = {}
+    for parent, child in edges:
+        parents_of.setdefault(child, []).append(parent)
+    n_added = 0
+    children_of = {}
+    for child, parents in parents_of.items():
+        members = child.parents._members
+        new_parents = [parent for parent in dict.fromkeys(parents)
+                       if parent not in members]
+        child.parents._extend_new(new_parents)
+        n_added += len(new_parents)
+        for parent in new_parents:
+            children_of.setdefault(parent, []).append(child)
+    for parent, children in children_of.items():
+        parent.children._extend_new(children)
+    return n_added
+
+
+def _add_edges(parents, children):
+    """Makes every node in parents a parent of every node in children
+
+    Like ``_add_edge``, but membership tests and insertions for each node are
+    done in bulk.
+
+    Returns
+    -------
+    n_added : int
+        Number of new edges.
+    """
+    parents = list(dict.fromkeys(parents))
+    children = list(dict.fromkeys(children))
+    n_added = 0
+    for child in children:
+        members = child.parents._members
+        new_parents = [parent for parent in parents if parent not in members]
+        child.parents._extend_new(new_parents)
+        n_added += len(new_parents)
+    for parent in parents:
+        members = parent.children._members
+        parent.children._extend_new(
+            [child for child in children if child not in members])
+    return n_added
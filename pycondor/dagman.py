@@ -1,12 +1,23 @@
 
 import os
-import subprocess
+import asyncio
+import functools
 
-from .utils import (checkdir, get_condor_version, requires_command,
-                    split_command_string, decode_string)
-from .basenode import BaseNode
+from .utils import get_condor_version
+from .basenode import (BaseNode, NodeList, _BuildContext, _add_edges,
+                       _add_edge_pairs)
 from .job import Job
 from .visualize import visualize as _visualize
+from . import serialize
+from .submit import submit_dag_file, submit_dag_file_async
+
+
+# Buffer size used when writing DAG files
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Maximum number of threads writing DAG shard files, when the build doesn't
+# use workers
+_MAX_SHARD_WORKERS = (os.cpu_count() or 1) * 4
 
 
 def _get_subdag_string(dagman):
@@ -16,8 +27,14 @@ def _get_subdag_string(dagman):
             'Expecting a Dagman object, got {}'.format(type(dagman)),
         )
 
-    subdag_string = 'SUBDAG EXTERNAL {} {}'.format(dagman.submit_name,
-                                                   dagman.submit_file)
+    # Spliced Dagmans are merged into the DAG of their parent Dagman, rather
+    # than being run by a separate DAGMan job
+    if dagman.splice:
+        subdag_string = 'SPLICE {} {}'.format(dagman.submit_name,
+                                              dagman.submit_file)
+    else:
+        subdag_string = 'SUBDAG EXTERNAL {} {}'.format(dagman.submit_name,
+                                                       dagman.submit_file)
 
     return subdag_string
 
@@ -50,41 +67,234 @@ def _iter_job_args(job):
     if len(job.args) == 0:
         return
     else:
-        for idx, job_arg in enumerate(job):
-            arg, name, retry = job_arg
-            if name is not None:
-                node_name = '{}_{}'.format(job.submit_name, name)
-            else:
-                node_name = '{}_arg_{}'.format(job.submit_name, idx)
+        for node_name, job_arg in zip(job._get_expanded_node_names(),
+                                      job.args):
             yield node_name, job_arg
 
 
-def _get_parent_child_string(node):
-    """Constructs the parent/child line for node to be added to a Dagman
+def _get_node_names(node):
+    """Returns the DAG node names for node
+
+    Jobs with arguments have one node name per argument (see
+    ``_iter_job_args``), while Jobs without arguments and Dagmans are a single
+    node. Strings are taken to already be node names (e.g. join nodes).
     """
+    if isinstance(node, str):
+        return [node]
+    elif isinstance(node, Job) and len(node) > 0:
+        if not getattr(node, '_built', False):
+            raise ValueError('Job {} must be built before adding it '
+                             'to a Dagman'.format(node.name))
+        return node._get_expanded_node_names()
+    else:
+        return [node.submit_name]
 
-    if not isinstance(node, BaseNode):
-        raise ValueError('Expecting a Job or Dagman object, '
-                         'got {}'.format(type(node)))
 
-    parent_string = 'Parent'
-    for parent_node in node.parents:
-        if isinstance(parent_node, Job) and len(parent_node) > 0:
-            for node_name, job_arg in _iter_job_args(parent_node):
-                parent_string += ' {}'.format(node_name)
+def _get_dependency_groups(nodes, parents_of=None):
+    """Groups nodes that have identical sets of parents
+
+    Parameters
+    ----------
+    nodes : list
+        Nodes in topological order.
+    parents_of : dict, optional
+        Maps each node to its parents. Defaults to ``node.parents``.
+
+    Returns
+    -------
+    groups : list
+        List of ``(parents, children)`` tuples, ordered by the first child in
+        each group. Nodes without parents aren't included.
+    """
+    groups = {}
+    for node in nodes:
+        parents = parents_of[node] if parents_of is not None else node.parents
+        if not parents:
+            continue
+        key = frozenset(parents)
+        if key in groups:
+            groups[key][1].append(node)
         else:
-            parent_string += ' {}'.format(parent_node.submit_name)
+            groups[key] = (list(parents), [node])
+
+    return list(groups.values())
+
+
+def _split(items, n_parts):
+    # Splits the list items into at most n_parts contiguous, non-empty chunks
+    # of (nearly) equal size. Yields (offset, chunk) pairs.
+    if not items:
+        return
+    size = -(-len(items) // n_parts)
+    for offset in range(0, len(items), size):
+        yield offset, items[offset:offset + size]
 
-    child_string = 'Child'
-    if isinstance(node, Job) and len(node) > 0:
-        for node_name, job_arg in _iter_job_args(node):
-            child_string += ' {}'.format(node_name)
-    else:
-        child_string += ' {}'.format(node.submit_name)
 
-    parent_child_string = parent_string + ' ' + child_string
+def _write_lines(f, lines, newline=''):
+    """Writes lines to the file object f, separated by newlines
 
-    return parent_child_string
+    newline is written before the first line. Returns the separator to write
+    before any following line.
+    """
+    for line in lines:
+        f.write(newline)
+        f.write(line)
+        newline = '\n'
+    return newline
+
+
+def _iter_submit_description_blocks(submit_descriptions):
+    # Yields a SUBMIT-DESCRIPTION block for each (name, description) pair
+    for name, description in submit_descriptions:
+        yield 'SUBMIT-DESCRIPTION {} {{\n{}\n}}'.format(name, description)
+
+
+def _write_dependency_lines(f, dependencies, newline=''):
+    """Writes a parent/child line for each (parents, children) pair
+
+    Lines are written piece by piece, so that lines with many parents or
+    children are never built in memory. Returns the separator to write before
+    any following line.
+    """
+    for parents, children in dependencies:
+        f.write(newline)
+        f.write('Parent')
+        for parent in parents:
+            f.write(' ')
+            f.write(' '.join(_get_node_names(parent)))
+        f.write(' Child')
+        for child in children:
+            f.write(' ')
+            f.write(' '.join(_get_node_names(child)))
+        newline = '\n'
+    return newline
+
+
+def _n_node_names(node):
+    # Number of DAG nodes node is written as (see _get_node_names)
+    if isinstance(node, Job):
+        return len(node) or 1
+    return 1
+
+
+def _get_topological_order(dag):
+    """Orders the nodes in dag so that parents come before their children
+
+    Uses an iterative depth-first search over node parents, so there's no
+    recursion limit on the depth of the graph. Nodes are visited in the order
+    they were added to dag, so if that order is already a valid topological
+    order it is returned unchanged.
+
+    Parameters
+    ----------
+    dag : Dagman
+        Dagman whose nodes are to be ordered. Nested subdags are treated as
+        single nodes.
+
+    Returns
+    -------
+    order : list
+        Nodes of dag in topological order.
+
+    Raises
+    ------
+    ValueError
+        If the graph contains a cycle, or if a node has a parent that isn't
+        in dag.
+    """
+    in_progress, done = 1, 2
+    state = {}
+    order = []
+    for start_node in dag.nodes:
+        if start_node in state:
+            continue
+        state[start_node] = in_progress
+        path = [start_node]
+        stack = [iter(start_node.parents)]
+        while stack:
+            for parent in stack[-1]:
+                parent_state = state.get(parent)
+                if parent_state == done:
+                    continue
+                elif parent_state == in_progress:
+                    # parent is an ancestor of path[-1] in the search, so the
+                    # path from parent to the end of path forms a cycle
+                    cycle = path[path.index(parent):]
+                    cycle = [parent] + cycle[:0:-1] + [parent]
+                    raise ValueError(
+                        'Dagman {} contains a cycle: {}'.format(
+                            dag.name,
+                            ' -> '.join(node.name for node in cycle)),
+                    )
+                elif parent not in dag.nodes:
+                    raise ValueError(
+                        '{} is a parent of {}, but is not a node in '
+                        'Dagman {}'.format(parent.name, path[-1].name,
+                                           dag.name),
+                    )
+                state[parent] = in_progress
+                path.append(parent)
+                stack.append(iter(parent.parents))
+                break
+            else:
+                # All parents of path[-1] have been ordered
+                stack.pop()
+                node = path.pop()
+                state[node] = done
+                order.append(node)
+
+    return order
+
+
+def _get_transitive_reduction(nodes):
+    """Finds the parents of each node that aren't implied by other parents
+
+    An edge from a parent to a node is redundant if the parent is also an
+    ancestor of another parent of the node (e.g. A -> C when A -> B -> C
+    already exists). Ancestors are tracked as integer bitsets indexed by
+    topological position, and the ancestor set of a node is dropped as soon as
+    all of its children have been processed.
+
+    Parameters
+    ----------
+    nodes : list
+        Nodes in topological order (see ``_get_topological_order``). All
+        parents of each node must also be in nodes.
+
+    Returns
+    -------
+    reduced_parents : dict
+        Maps each node to the list of its parents that are kept, in the same
+        order as ``node.parents``.
+    n_removed : int
+        Number of redundant edges.
+    """
+    index = {node: idx for idx, node in enumerate(nodes)}
+    n_children = {node: sum(1 for child in node.children if child in index)
+                  for node in nodes}
+    ancestors = {}
+    reduced_parents = {}
+    n_removed = 0
+    for node in nodes:
+        parents = node.parents
+        # Nodes reachable from node through a path of more than one edge
+        indirect = 0
+        for parent in parents:
+            indirect |= ancestors[parent]
+        kept = [parent for parent in parents
+                if not indirect & (1 << index[parent])]
+        n_removed += len(parents) - len(kept)
+        reduced_parents[node] = kept
+
+        for parent in parents:
+            indirect |= 1 << index[parent]
+            n_children[parent] -= 1
+            if n_children[parent] == 0:
+                del ancestors[parent]
+        if n_children[node]:
+            ancestors[node] = indirect
+
+    return reduced_parents, n_removed
 
 
 class Dagman(BaseNode):
@@ -120,10 +330,25 @@ class Dagman(BaseNode):
         Level of logging verbosity option are 0-warning, 1-info,
         2-debugging (default is 0).
 
+    splice : bool, optional
+        When this Dagman is a subdag, include it in the DAG of its parent
+        Dagman with ``SPLICE`` rather than ``SUBDAG EXTERNAL``. The nodes of
+        a spliced Dagman are then run by the same DAGMan process as the
+        nodes of its parent, instead of by a separate DAGMan job with its own
+        log and rescue files. Dependencies on a spliced Dagman apply to all of
+        its nodes without parents (as a child) or without children (as a
+        parent) (default is ``False``).
+
+        .. versionadded:: 0.7.0
+
     Attributes
     ----------
-    jobs : list
-        The list of jobs for this Dagman instance to manage.
+    nodes : list
+        The list of Jobs and sub-Dagmans for this Dagman instance to manage.
+        Nodes can also be looked up by name, e.g. ``dagman['jobname']``.
+        Nodes should be added with ``add_job`` and ``add_subdag`` (or the
+        ``dag`` argument of Jobs and Dagmans), which check that their names
+        are unique.
 
     parents : list
         List of parent Jobs and Dagmans. Ensures that Jobs and Dagmans in the
@@ -132,20 +357,30 @@ class Dagman(BaseNode):
     children : list
         List of child Jobs and Dagmans. Ensures that Jobs and Dagmans in the
         children list will be submitted only after this Dagman has completed.
+
+    build_stats : dict
+        Statistics about the most recent build of this Dagman (e.g. the number
+        of dependencies dropped by ``build(reduce_edges=True)``, or the number
+        of files written and directory checks saved).
     """
     def __init__(self, name, submit=None, extra_lines=None, dag=None,
-                 verbose=0):
+                 verbose=0, splice=False):
 
         super(Dagman, self).__init__(name, submit, extra_lines, dag, verbose)
 
-        self.nodes = []
+        self.splice = splice
+        self.nodes = NodeList()
+        self._node_names = {}
         self._has_bad_node_names = False
-        self.logger.debug('{} initialized'.format(self.name))
+        self.build_stats = {}
+        self._debug('{} initialized', self.name)
 
     def __repr__(self):
         nondefaults = ''
+        default_attr = ['name', 'nodes', 'build_stats', '_node_names',
+                        '_logger', '_verbose']
         for attr in sorted(vars(self)):
-            if getattr(self, attr) and attr not in ['name', 'nodes', 'logger']:
+            if getattr(self, attr) and attr not in default_attr:
                 nondefaults += ', {}={}'.format(attr, getattr(self, attr))
         output = 'Dagman(name={}, n_nodes={}{})'.format(self.name,
                                                         len(self.nodes),
@@ -162,6 +397,21 @@ class Dagman(BaseNode):
     def __contains__(self, item):
         return item in self.nodes
 
+    def __getitem__(self, name):
+        try:
+            return self._get_node_index()[name]
+        except KeyError:
+            raise KeyError('Dagman {} has no node named {}'.format(
+                self.name, name)) from None
+
+    def _get_node_index(self):
+        # Returns the dict mapping the name of each node to the node. Nodes
+        # appended to (or removed from) self.nodes directly, rather than
+        # through _add_node, are picked up by rebuilding it.
+        if len(self._node_names) != len(self.nodes):
+            self._node_names = {node.name: node for node in self.nodes}
+        return self._node_names
+
     def _hasnode(self, node):
         return node in self.nodes
 
@@ -169,13 +419,17 @@ class Dagman(BaseNode):
         # Don't bother adding node if it's already been added
         if self._hasnode(node):
             return self
-        if isinstance(node, BaseNode):
-            self.nodes.append(node)
-        else:
+        if not isinstance(node, BaseNode):
             raise TypeError('Expecting a Job or Dagman. '
                             'Got an object of type {}'.format(type(node)))
-        self.logger.debug(
-            'Added {} to Dagman {}'.format(node.name, self.name))
+        # Node names end up as DAGMan node names, so they must be unique
+        if node.name in self._get_node_index():
+            raise ValueError('Dagman {} already has a node named {}. Node '
+                             'names must be unique within a '
+                             'Dagman.'.format(self.name, node.name))
+        self.nodes.append(node)
+        self._node_names[node.name] = node
+        self._debug('Added {} to Dagman {}', node.name, self.name)
 
         return self
 
@@ -215,7 +469,112 @@ class Dagman(BaseNode):
 
         return self
 
-    def _get_job_arg_lines(self, job, fancyname):
+    def _check_edge_node(self, node, method):
+        # Nodes in self.nodes are guaranteed to be BaseNode instances
+        if node in self.nodes:
+            return
+        if not isinstance(node, BaseNode):
+            raise TypeError(
+                '{}() is expecting Job or Dagman instances. Got an object '
+                'of type {}'.format(method, type(node)),
+            )
+        raise ValueError('{} is not a node in Dagman {}'.format(node.name,
+                                                               self.name))
+
+    def add_edges(self, edges):
+        """Adds parent/child relationships between nodes in the Dagman
+
+        All edges are validated before any of them are added, so either all
+        or none of the edges are added.
+
+        Parameters
+        ----------
+        edges : iterable
+            Iterable of ``(parent, child)`` pairs of Jobs and/or Dagmans. Both
+            nodes in each pair must already have been added to this Dagman.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+
+        Examples
+        --------
+        >>> import pycondor
+        >>> dag = pycondor.Dagman('mydag')
+        >>> job_1 = pycondor.Job('job_1', 'myscript.py', dag=dag)
+        >>> job_2 = pycondor.Job('job_2', 'myscript.py', dag=dag)
+        >>> dag.add_edges([(job_1, job_2)])
+        """
+        edges = list(edges)
+        for edge in edges:
+            if not isinstance(edge, (list, tuple)) or len(edge) != 2:
+                raise TypeError('add_edges() is expecting an iterable of '
+                                '(parent, child) pairs. Got {}'.format(edge))
+        # Validate each distinct node once
+        nodes = {id(node): node for edge in edges for node in edge}
+        for node in nodes.values():
+            self._check_edge_node(node, 'add_edges')
+        for parent, child in edges:
+            if parent is child:
+                raise ValueError('Cannot add {} as a parent of '
+                                 'itself'.format(parent.name))
+
+        n_added = _add_edge_pairs(edges)
+        self._debug('Added {} edges ({} given) to Dagman {}', n_added,
+                    len(edges), self.name)
+
+        return self
+
+    def connect(self, parents, children):
+        """Makes every node in parents a parent of every node in children
+
+        Parameters
+        ----------
+        parents : Job, Dagman, or iterable
+            Job, Dagman, or iterable of Jobs and/or Dagmans that must complete
+            before any of the nodes in children start.
+
+        children : Job, Dagman, or iterable
+            Job, Dagman, or iterable of Jobs and/or Dagmans to add as children
+            of all the nodes in parents.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+
+        Examples
+        --------
+        >>> import pycondor
+        >>> dag = pycondor.Dagman('mydag')
+        >>> processing = [pycondor.Job('processing_{}'.format(i),
+        ...                            'process.py', dag=dag)
+        ...               for i in range(100)]
+        >>> merge = pycondor.Job('merge', 'merge.py', dag=dag)
+        >>> dag.connect(processing, merge)
+        """
+        node_lists = []
+        for nodes in [parents, children]:
+            nodes = [nodes] if isinstance(nodes, BaseNode) else list(nodes)
+            for node in nodes:
+                self._check_edge_node(node, 'connect')
+            node_lists.append(nodes)
+        parents, children = node_lists
+        parent_set = set(parents)
+        for child in children:
+            if child in parent_set:
+                raise ValueError('Cannot add {} as a parent of '
+                                 'itself'.format(child.name))
+
+        n_added = _add_edges(parents, children)
+        self._debug('Connected {} parents to {} children ({} new edges) in '
+                    'Dagman {}', len(parents), len(children), n_added,
+                    self.name)
+
+        return self
+
+    def _get_job_arg_lines(self, job):
         """Constructs the lines to be added to a Dagman related to job
         """
 
@@ -225,40 +584,303 @@ class Dagman(BaseNode):
             raise ValueError('Job {} must be built before adding it '
                              'to a Dagman'.format(job.name))
 
-        job_arg_lines = []
+        return list(self._iter_job_arg_lines(job))
+
+    def _iter_job_arg_lines(self, job, submit_file=None):
+        """Yields the lines to be added to a Dagman related to job
+
+        Unlike ``_get_job_arg_lines``, job isn't validated. If given,
+        submit_file (e.g. the name of a SUBMIT-DESCRIPTION block) is used in
+        the JOB lines instead of the submit file of job.
+        """
+        if submit_file is None:
+            submit_file = job.submit_file
+        job_name_macro = getattr(job, '_job_name_macro', False)
         if len(job.args) == 0:
-            job_line = 'JOB {} {}'.format(job.submit_name, job.submit_file)
-            job_arg_lines.append(job_line)
-        else:
-            for node_name, job_arg in _iter_job_args(job):
-                # Check that '.' or '+' are not in node_name
-                if '.' in node_name or '+' in node_name:
-                    self._has_bad_node_names = True
-
-                arg, name, retry = job_arg
-                # Add JOB line with Job submit file
-                job_line = 'JOB {} {}'.format(node_name, job.submit_file)
-                job_arg_lines.append(job_line)
-                # Add job ARGS line for command line arguments
-                arg_line = 'VARS {} ARGS="{}"'.format(node_name, arg)
-                job_arg_lines.append(arg_line)
-                # Define job_name variable if there are arg_names for job
-                if job._has_arg_names:
-                    if name is not None:
-                        job_name = node_name
-                    else:
-                        job_name = job.submit_name
-                    job_name_line = 'VARS {} job_name="{}"'.format(node_name,
-                                                                   job_name)
-                    job_arg_lines.append(job_name_line)
-                # Add retry line for Job
-                if retry is not None:
-                    retry_line = 'Retry {} {}'.format(node_name, retry)
-                    job_arg_lines.append(retry_line)
-
-        return job_arg_lines
-
-    def build(self, makedirs=True, fancyname=True):
+            yield 'JOB {} {}'.format(job.submit_name, submit_file)
+            if job_name_macro:
+                yield 'VARS {} job_name="{}"'.format(job.submit_name,
+                                                     job.submit_name)
+            return
+
+        for node_name, job_arg in _iter_job_args(job):
+            # Check that '.' or '+' are not in node_name
+            if '.' in node_name or '+' in node_name:
+                self._has_bad_node_names = True
+
+            arg, name, retry = job_arg
+            # Add JOB line with Job submit file
+            yield 'JOB {} {}'.format(node_name, submit_file)
+            # Add job ARGS line for command line arguments
+            yield 'VARS {} ARGS="{}"'.format(node_name, arg)
+            # Define job_name variable if there are arg_names for job, or its
+            # submit file is shared with other Jobs
+            if job._has_arg_names or job_name_macro:
+                if name is not None:
+                    job_name = node_name
+                else:
+                    job_name = job.submit_name
+                yield 'VARS {} job_name="{}"'.format(node_name, job_name)
+            # Add retry line for Job
+            if retry is not None:
+                yield 'Retry {} {}'.format(node_name, retry)
+
+    def _validate(self):
+        # Returns a dict mapping this Dagman and every nested subdag to the
+        # topological order of its nodes
+        orders = {}
+        dags = [self]
+        while dags:
+            dag = dags.pop()
+            if dag in orders:
+                continue
+            orders[dag] = _get_topological_order(dag)
+            dags.extend(node for node in dag.nodes
+                        if isinstance(node, Dagman))
+        return orders
+
+    def validate(self):
+        """Checks that the Dagman graph is a valid DAG
+
+        Checks that there are no cycles in the parent/child relationships of
+        the nodes in this Dagman, or in any nested subdags, and that every
+        parent of a node is in the same Dagman as the node itself. This is
+        done automatically at the start of ``build``.
+
+        Returns
+        -------
+        order : list
+            Nodes of this Dagman in topological order (i.e. parents before
+            children). Nodes are kept in the order they were added to the
+            Dagman where possible.
+
+        Raises
+        ------
+        ValueError
+            If a cycle is found, or a node has a parent that isn't in the same
+            Dagman. The error message includes the offending cycle.
+        """
+        return self._validate()[self]
+
+    def _iter_node_lines(self, nodes, submit_refs=None, offset=0,
+                         n_nodes=None):
+        # Yields the JOB, VARS, Retry, SUBDAG, etc. lines for nodes.
+        # submit_refs optionally maps Jobs to the SUBMIT-DESCRIPTION block to
+        # use instead of their submit file. offset and n_nodes give the
+        # position of nodes among all the nodes being written, for logging.
+        if n_nodes is None:
+            n_nodes = len(nodes)
+        for node_index, node in enumerate(nodes, start=offset + 1):
+            self.logger.info('Working on {} [{} of {}]'.format(node.name,
+                             node_index, n_nodes))
+            if isinstance(node, Job):
+                # Add Job variables to Dagman submit file
+                submit_file = submit_refs[node] if submit_refs else None
+                for line in self._iter_job_arg_lines(node, submit_file):
+                    yield line
+            elif isinstance(node, Dagman):
+                yield _get_subdag_string(node)
+            else:
+                raise TypeError('Nodes must be either a Job or Dagman object')
+
+    def _iter_extra_node_lines(self, join_names=(), noop_submit_file=None):
+        # Yields the lines for join nodes, followed by any extra lines
+        for join_name in join_names:
+            yield 'JOB {} {} NOOP'.format(join_name, noop_submit_file)
+
+        # Add any extra lines to submit file, if specified
+        if self.extra_lines:
+            for line in self.extra_lines:
+                yield line
+
+    def _write_dag_file(self, f, nodes, dependencies, join_names=(),
+                        noop_submit_file=None, submit_descriptions=(),
+                        submit_refs=None):
+        """Writes the DAG file contents to the file object f
+
+        Lines are written as they are generated rather than collected in
+        memory first, so memory use doesn't grow with the size of the DAG
+        file. The output is newline-separated, without a trailing newline.
+        Any ``(name, description)`` pairs in submit_descriptions are written
+        as SUBMIT-DESCRIPTION blocks before the nodes.
+        """
+        newline = _write_lines(
+            f, _iter_submit_description_blocks(submit_descriptions))
+        newline = _write_lines(f, self._iter_node_lines(nodes, submit_refs),
+                               newline)
+        newline = _write_lines(
+            f, self._iter_extra_node_lines(join_names, noop_submit_file),
+            newline)
+        f.write(newline)
+        f.write('\n#Inter-job dependencies')
+
+        # Add parent/child information
+        _write_dependency_lines(f, dependencies, '\n')
+
+    def _write_dag_shards(self, context, nodes, dependencies, n_shards,
+                          join_names=(), noop_submit_file=None,
+                          submit_descriptions=(), submit_refs=None):
+        """Writes the DAG file as a small file including shard files
+
+        The node lines and the dependency lines are each split into at most
+        n_shards include files with (nearly) equal numbers of nodes or
+        dependencies, which are written in parallel. Node shards are included
+        before dependency shards, since DAGMan requires nodes to be defined
+        before they are used in a dependency.
+
+        Returns
+        -------
+        n_written : int
+            Number of shard files.
+        """
+        descriptions = dict(submit_descriptions)
+
+        def write_node_shard(f, offset, chunk):
+            # SUBMIT-DESCRIPTION blocks go in the shard of the Job they are
+            # named after, which comes before any other Job using them
+            blocks = [(node.submit_name, descriptions[node.submit_name])
+                      for node in chunk
+                      if submit_refs and isinstance(node, Job)
+                      and submit_refs[node] == node.submit_name]
+            newline = _write_lines(f, _iter_submit_description_blocks(blocks))
+            _write_lines(f, self._iter_node_lines(chunk, submit_refs, offset,
+                                                  len(nodes)), newline)
+
+        shards = []
+        node_files = []
+        for index, (offset, chunk) in enumerate(_split(nodes, n_shards)):
+            shard_file = os.path.join(
+                self.submit, '{}_nodes_{}.dag'.format(self.submit_name, index))
+            shards.append((shard_file, functools.partial(
+                write_node_shard, offset=offset, chunk=chunk)))
+            node_files.append(shard_file)
+        dependency_files = []
+        for index, (_, chunk) in enumerate(_split(dependencies, n_shards)):
+            shard_file = os.path.join(
+                self.submit,
+                '{}_dependencies_{}.dag'.format(self.submit_name, index))
+            shards.append((shard_file, functools.partial(
+                _write_dependency_lines, dependencies=chunk)))
+            dependency_files.append(shard_file)
+
+        context.map(
+            lambda shard: context.write_file(shard[0], shard[1],
+                                             buffering=_WRITE_BUFFER_SIZE),
+            shards,
+            workers=context.workers or min(n_shards, _MAX_SHARD_WORKERS),
+        )
+
+        def write_dag_file(f):
+            newline = _write_lines(f, ('INCLUDE {}'.format(shard_file)
+                                       for shard_file in node_files))
+            newline = _write_lines(
+                f, self._iter_extra_node_lines(join_names, noop_submit_file),
+                newline)
+            f.write(newline)
+            f.write('\n#Inter-job dependencies')
+            _write_lines(f, ('INCLUDE {}'.format(shard_file)
+                             for shard_file in dependency_files), '\n')
+
+        context.write_file(self.submit_file, write_dag_file)
+
+        return len(shards)
+
+    def _get_dependencies(self, nodes, parents_of=None, join_nodes=False,
+                          group_children=False):
+        """Gets the parent/child dependencies to write to the DAG file
+
+        Parameters
+        ----------
+        nodes : list
+            Nodes in topological order.
+        parents_of : dict, optional
+            Maps each node to the parents to write for it (e.g. after
+            transitive reduction). Defaults to ``node.parents``.
+        join_nodes : bool, optional
+            Whether or not to insert NOOP join nodes between groups of parents
+            and children (see ``build``).
+        group_children : bool, optional
+            Whether or not to write nodes with identical parents on a single
+            parent/child line (see ``build``).
+
+        Returns
+        -------
+        dependencies : list
+            List of ``(parents, children)`` tuples, one per parent/child line.
+            Join nodes are given by their node name.
+        join_names : list
+            Names of the join nodes in dependencies.
+        """
+        if not (join_nodes or group_children):
+            dependencies = []
+            for node in nodes:
+                parents = parents_of[node] if parents_of else node.parents
+                if parents:
+                    dependencies.append((parents, [node]))
+            return dependencies, []
+
+        dependencies = []
+        join_names = []
+        # Names of the nodes written to the DAG file, which join node names
+        # must not clash with. Only computed if a join node is needed.
+        node_names = None
+        n_edges_saved = 0
+        for parents, children in _get_dependency_groups(nodes, parents_of):
+            n_parents = sum(_n_node_names(parent) for parent in parents)
+            n_children = sum(_n_node_names(child) for child in children)
+            n_edges = n_parents * n_children
+            n_join_edges = n_parents + n_children
+            if join_nodes and n_join_edges < n_edges:
+                if node_names is None:
+                    node_names = {name for node in nodes
+                                  for name in _get_node_names(node)}
+                join_name = self._get_join_name(len(join_names), node_names)
+                node_names.add(join_name)
+                join_names.append(join_name)
+                dependencies.append((parents, [join_name]))
+                dependencies.append(([join_name], children))
+                n_edges_saved += n_edges - n_join_edges
+            elif group_children:
+                dependencies.append((parents, children))
+            else:
+                for child in children:
+                    child_parents = (parents_of[child] if parents_of
+                                     else child.parents)
+                    dependencies.append((child_parents, [child]))
+
+        if join_nodes:
+            self.build_stats['join_nodes'] = len(join_names)
+            self.build_stats['join_edges_saved'] = n_edges_saved
+            self.logger.info('Added {} join nodes to Dagman {} (saving {} '
+                             'dependencies)'.format(len(join_names),
+                                                    self.name, n_edges_saved))
+
+        return dependencies, join_names
+
+    def _get_join_name(self, index, node_names):
+        # Returns a join node name that isn't one of node_names
+        join_name = '{}_join_{}'.format(self.submit_name, index)
+        while join_name in node_names:
+            join_name += '_'
+        return join_name
+
+    def _write_noop_submit_file(self, context):
+        # NOOP nodes are never submitted, but DAGMan still expects their JOB
+        # line to point to a submit file
+        noop_submit_file = os.path.join(
+            self.submit, '{}_noop.submit'.format(self.submit_name))
+        context.checkdir(noop_submit_file)
+        contents = ('# Submit file for NOOP join nodes in {}. These nodes '
+                    'are never submitted.\n'.format(self.submit_name)
+                    + 'executable = /bin/true\nqueue')
+        context.write_file(noop_submit_file, lambda f: f.write(contents))
+
+        return noop_submit_file
+
+    def build(self, makedirs=True, fancyname=True, reduce_edges=False,
+              join_nodes=False, group_children=False, workers=None,
+              incremental=False, share_submit_files=False,
+              inline_submit=False, shards=None, backend=None):
         """Build and saves the submit file for Dagman
 
         Parameters
@@ -273,6 +895,99 @@ class Dagman(BaseNode):
             file becomes ``dagname_YYYYMMD_id``. This is useful when running
             several Dags/Jobs of the same name (default is ``True``).
 
+        reduce_edges : bool, optional
+            Only write the minimal set of dependencies needed to enforce the
+            parent/child relationships of the Dagman nodes (i.e. the
+            transitive reduction of the graph). For example, if A is a parent
+            of B and C, and B is a parent of C, the A -> C dependency is
+            dropped. The number of dropped dependencies is stored in
+            ``build_stats['edges_removed']`` (default is ``False``).
+
+            .. versionadded:: 0.7.0
+
+        join_nodes : bool, optional
+            When a group of nodes all have exactly the same parents, and
+            writing every parent/child pair would take more dependencies than
+            going through an intermediate node, insert a ``NOOP`` join node
+            between the parents and children. For example, 100 parents with
+            100 children then need 200 dependencies rather than 10,000. The
+            number of join nodes is stored in ``build_stats['join_nodes']``
+            (default is ``False``).
+
+            .. versionadded:: 0.7.0
+
+        group_children : bool, optional
+            Write nodes that have exactly the same parents as a single
+            ``Parent ... Child ...`` line, rather than one line per node. This
+            can make the DAG file much smaller when many nodes share a large
+            set of parents (default is ``False``).
+
+            .. versionadded:: 0.7.0
+
+        workers : int or None, optional
+            Number of threads to use for writing Job submit files, which can
+            speed up builds on shared or network filesystems. Submit names are
+            assigned before any files are written, so they don't depend on
+            the number of workers (default is ``None``, no threads).
+
+            .. versionadded:: 0.7.0
+
+        incremental : bool, optional
+            Only write submit and DAG files whose contents have changed since
+            they were last written by an incremental build. The content hash
+            of each file written is kept in a ``.pycondor_manifest.json``
+            file in its directory. Unchanged files are left untouched (so
+            their modification times are preserved). This requires stable
+            submit names, so ``fancyname=False`` must be used, otherwise a
+            ``ValueError`` is raised. The number of files written and reused
+            is stored in ``build_stats['files_written']`` and
+            ``build_stats['files_reused']`` (default is ``False``).
+
+            .. versionadded:: 0.7.0
+
+        share_submit_files : bool, optional
+            Jobs whose submit descriptions are identical apart from their
+            name and arguments share a single submit file, which all of their
+            JOB lines point to. To make this possible, log, output, and error
+            files are named using the ``$(job_name)`` macro, which is defined
+            for every node. The number of Jobs using another Job's submit
+            file is stored in ``build_stats['submit_files_shared']``. With
+            ``fancyname=True`` every Job still reserves its own (empty)
+            submit file, so that names aren't reused by later builds, and a
+            warning is logged (default is ``False``).
+
+            .. versionadded:: 0.7.0
+
+        inline_submit : bool, optional
+            Write the submit description of each Job into the DAG file, as a
+            ``SUBMIT-DESCRIPTION`` block, instead of into a separate submit
+            file. Requires a version of HTCondor whose DAGMan supports
+            ``SUBMIT-DESCRIPTION``. When combined with
+            ``share_submit_files``, Jobs in the same DAG file with identical
+            descriptions share a block. Requires ``fancyname=False``, a
+            ``ValueError`` is raised otherwise (default is ``False``).
+
+            .. versionadded:: 0.7.0
+
+        shards : int or None, optional
+            Split the node and dependency sections of each DAG file into at
+            most ``shards`` files each, with (nearly) equal numbers of nodes
+            or dependencies, that are written in parallel and included from
+            a small top-level DAG file with ``INCLUDE``. Combined with
+            ``incremental``, only the shards that changed are rewritten. The
+            number of shard files is stored in ``build_stats['shard_files']``
+            (default is ``None``, a single DAG file).
+
+            .. versionadded:: 0.7.0
+
+        backend : FileBackend or MemoryBackend, optional
+            Backend to write all submit and DAG files to. For example, use a
+            ``MemoryBackend`` to render every file in memory, in its
+            ``files`` mapping of path to contents, without writing anything
+            to disk (default is ``None``, a ``FileBackend``).
+
+            .. versionadded:: 0.7.0
+
         Returns
         -------
         self : object
@@ -284,66 +999,236 @@ class Dagman(BaseNode):
                 'Skipping the build process...'.format(self.name),
             )
             return self
+        if shards is not None and (not isinstance(shards, int)
+                                   or shards < 1):
+            raise ValueError('shards must be a positive int')
+        if incremental and fancyname:
+            raise ValueError('incremental builds require stable submit '
+                             'names, use fancyname=False')
+        if inline_submit and fancyname:
+            raise ValueError('inline_submit writes no per-Job submit files '
+                             'to reserve names with, use fancyname=False')
+        if fancyname and share_submit_files:
+            self.logger.warning(
+                'Building {} with share_submit_files and fancyname=True. '
+                'Every Job still reserves its name with its own (empty) '
+                'submit file, use fancyname=False to only write the shared '
+                'submit files.'.format(self.name),
+            )
+
+        orders = self._validate()
+        context = _BuildContext(makedirs, fancyname, workers, incremental,
+                                backend=backend,
+                                reduce_edges=reduce_edges,
+                                join_nodes=join_nodes,
+                                group_children=group_children,
+                                share_submit_files=share_submit_files,
+                                inline_submit=inline_submit,
+                                shards=shards)
+
+        # Give this Dagman and all of its nodes a submit name before writing
+        # any files, so names don't depend on the order files are written in
+        dags = []
+        self._set_submit_names(context, orders, dags)
+
+        # Build submit files for all Jobs
+        # Note: nodes must be built before the submit file for a Dagman is built
+        jobs = [node for node in context.submit_names
+                if isinstance(node, Job)]
+        if inline_submit:
+            self._render_submit_descriptions(context, jobs)
+        elif share_submit_files:
+            n_shared = self._build_shared_submit_files(context, jobs)
+        else:
+            context.map(
+                lambda job: job._build_from_dag(makedirs, fancyname,
+                                                context.submit_names[job],
+                                                context),
+                jobs,
+            )
+
+        # Write DAG files, subdags first
+        for dag in dags:
+            dag._write_dag(context, orders[dag])
+        context.save_manifest()
+
+        self.build_stats['files_written'] = context.n_written
+        self.build_stats['files_reused'] = context.n_reused
+        self.build_stats['dir_checks_saved'] = context.n_dir_checks_saved
+        if share_submit_files and not inline_submit:
+            self.build_stats['submit_files_shared'] = n_shared
+        if incremental:
+            self.logger.info('Wrote {} files, reused {} unchanged '
+                             'files'.format(context.n_written,
+                                            context.n_reused))
 
-        name = self._get_fancyname() if fancyname else self.name
-        submit_file = os.path.join(self.submit, '{}.submit'.format(name))
-        self.submit_file = submit_file
-        self.submit_name = name
-        checkdir(self.submit_file, makedirs)
+        return self
 
-        # Build submit files for all nodes in self.nodes
-        # Note: nodes must be built before the submit file for self is built
-        for node_index, node in enumerate(self.nodes, start=1):
+    def _build_shared_submit_files(self, context, jobs):
+        # Writes one submit file per distinct submit description of jobs.
+        # Returns the number of Jobs using the submit file of another Job.
+        descriptions = context.map(
+            lambda job: job._get_submit_description(
+                context, indag=True, submit_name=context.submit_names[job],
+                job_name_macro=True),
+            jobs,
+        )
+        submit_files = {}
+        for job, description in zip(jobs, descriptions):
+            if description in submit_files:
+                job.submit_file = submit_files[description]
+            else:
+                submit_files[description] = job.submit_file
+            job._built = True
+
+        def write(item):
+            description, submit_file = item
+            context.write_file(submit_file, lambda f: f.write(description))
+
+        context.map(write, list(submit_files.items()))
+        self.logger.info('{} Jobs share {} submit files'.format(
+            len(jobs), len(submit_files)))
+
+        return len(jobs) - len(submit_files)
+
+    def _render_submit_descriptions(self, context, jobs):
+        # Renders the submit descriptions of jobs, to be written into DAG
+        # files, without writing any submit files
+        job_name_macro = context.options.get('share_submit_files', False)
+        descriptions = context.map(
+            lambda job: job._get_submit_description(
+                context, indag=True, submit_name=context.submit_names[job],
+                job_name_macro=job_name_macro),
+            jobs,
+        )
+        context.submit_descriptions = dict(zip(jobs, descriptions))
+        for job in jobs:
+            job._built = True
+
+    def _get_inline_submit_descriptions(self, context, nodes):
+        # Returns the (name, description) pairs for the SUBMIT-DESCRIPTION
+        # blocks of the Jobs in nodes, and a dict mapping each Job to the name
+        # of its block
+        share = context.options.get('share_submit_files', False)
+        blocks = []
+        block_names = {}
+        submit_refs = {}
+        for node in nodes:
+            if not isinstance(node, Job):
+                continue
+            description = context.submit_descriptions[node]
+            if share and description in block_names:
+                submit_refs[node] = block_names[description]
+                continue
+            block_names[description] = node.submit_name
+            submit_refs[node] = node.submit_name
+            blocks.append((node.submit_name, description))
+
+        return blocks, submit_refs
+
+    def _set_submit_names(self, context, orders, dags):
+        # Names this Dagman and, recursively, all of its nodes. Dagmans to be
+        # written are appended to dags, with subdags before their parents.
+        # With fancyname, all the names are reserved at once, so the submit
+        # files reserving them are created using the workers of the build.
+        nodes = []
+        self._collect_nodes(orders, dags, nodes, set())
+        for node, name in zip(nodes, context.get_submit_names(nodes)):
+            context.submit_names[node] = name
+            if isinstance(node, Dagman):
+                node.submit_name = name
+                node.submit_file = os.path.join(node.submit,
+                                                '{}.submit'.format(name))
+                context.checkdir(node.submit_file)
+
+    def _collect_nodes(self, orders, dags, nodes, seen):
+        # Appends this Dagman and, recursively, all of its nodes that need a
+        # submit name to nodes, in the order they are to be named
+        nodes.append(self)
+        seen.add(self)
+        for node in orders[self]:
+            if node in seen:
+                # Already named as a node of another Dagman
+                continue
             if isinstance(node, Job):
-                node._build_from_dag(makedirs, fancyname)
+                nodes.append(node)
+                seen.add(node)
             elif isinstance(node, Dagman):
-                node.build(makedirs, fancyname)
+                if getattr(node, '_built', False):
+                    node.logger.warning(
+                        '{} submit file has already been built. '
+                        'Skipping the build process...'.format(node.name),
+                    )
+                    continue
+                node._collect_nodes(orders, dags, nodes, seen)
             else:
                 raise TypeError('Nodes must be either a Job or Dagman object')
 
+        dags.append(self)
+
+    def _write_dag(self, context, nodes):
+        """Writes the DAG file for this Dagman
+
+        Parameters
+        ----------
+        context : _BuildContext
+            Context for the current build.
+        nodes : list
+            Nodes of this Dagman in topological order.
+        """
+        reduce_edges = context.options.get('reduce_edges', False)
+        join_nodes = context.options.get('join_nodes', False)
+        group_children = context.options.get('group_children', False)
+
+        self.build_stats = {}
+        if reduce_edges:
+            parents_of, n_removed = _get_transitive_reduction(nodes)
+            self.build_stats['edges_removed'] = n_removed
+            self.logger.info('Removed {} redundant dependencies from '
+                             'Dagman {}'.format(n_removed, self.name))
+        else:
+            parents_of = None
+
+        dependencies, join_names = self._get_dependencies(
+            nodes, parents_of, join_nodes, group_children)
+        self.build_stats['dependency_lines'] = len(dependencies)
+
+        noop_submit_file = None
+        if join_names:
+            noop_submit_file = self._write_noop_submit_file(context)
+
+        submit_descriptions, submit_refs = (), None
+        if context.options.get('inline_submit', False):
+            submit_descriptions, submit_refs = \
+                self._get_inline_submit_descriptions(context, nodes)
+            self.build_stats['submit_descriptions'] = len(submit_descriptions)
+            if context.options.get('share_submit_files', False):
+                self.build_stats['submit_files_shared'] = \
+                    len(submit_refs) - len(submit_descriptions)
+
         # Write dag submit file
         self.logger.info('Building DAG submission file {}...'.format(
             self.submit_file))
-        lines = []
-        parent_child_lines = []
-        for node_index, node in enumerate(self.nodes, start=1):
-            self.logger.info('Working on {} [{} of {}]'.format(node.name,
-                             node_index, len(self.nodes)))
-            # Build the BaseNode submit file
-            if isinstance(node, Job):
-                # Add Job variables to Dagman submit file
-                job_arg_lines = self._get_job_arg_lines(node, fancyname)
-                lines.extend(job_arg_lines)
-            elif isinstance(node, Dagman):
-                subdag_string = _get_subdag_string(node)
-                lines.append(subdag_string)
-            else:
-                raise TypeError('Nodes must be either a Job or Dagman object')
-            # Add parent/child information, if necessary
-            if node.hasparents():
-                parent_child_string = _get_parent_child_string(node)
-                parent_child_lines.append(parent_child_string)
-
-        # Add any extra lines to submit file, if specified
-        if self.extra_lines:
-            lines.extend(self.extra_lines)
-
-        # Write lines to dag submit file
-        with open(submit_file, 'w') as dag:
-            dag.writelines('\n'.join(
-                lines
-                + ['\n#Inter-job dependencies']
-                + parent_child_lines),
+        n_shards = context.options.get('shards')
+        if n_shards:
+            self.build_stats['shard_files'] = self._write_dag_shards(
+                context, nodes, dependencies, n_shards, join_names,
+                noop_submit_file, submit_descriptions, submit_refs)
+        else:
+            context.write_file(
+                self.submit_file,
+                lambda f: self._write_dag_file(f, nodes, dependencies,
+                                               join_names, noop_submit_file,
+                                               submit_descriptions,
+                                               submit_refs),
+                buffering=_WRITE_BUFFER_SIZE,
             )
 
         self._built = True
         self.logger.info('Dagman submission file for {} successfully '
                          'built!'.format(self.name))
 
-        return self
-
-    @requires_command('condor_submit_dag')
-    def submit_dag(self, submit_options=None):
+    def submit_dag(self, submit_options=None, use_bindings=None):
         """Submits Dagman to condor
 
         Parameters
@@ -352,24 +1237,78 @@ class Dagman(BaseNode):
             Options to be passed to ``condor_submit_dag`` for this Dagman
             (see the `condor_submit_dag documentation
             <http://research.cs.wisc.edu/htcondor/manual/current/condor_submit_dag.html>`_
-            for possible options).
+            for possible options). Submitting with options always uses the
+            ``condor_submit_dag`` command.
+
+        use_bindings : bool or None, optional
+            Whether to submit through the HTCondor Python bindings, using a
+            single Schedd connection shared by all submissions (``True``), or
+            the ``condor_submit_dag`` command (``False``). Default is
+            ``None``, to use the bindings when the ``htcondor`` module can be
+            imported.
+
+            .. versionadded:: 0.7.0
 
         Returns
         -------
-        self : object
-            Returns self.
+        result : SubmitResult
+            Cluster ID, number of procs, return code, output and error output
+            of the submission, which is also stored in ``submit_result``.
+
+            .. versionchanged:: 0.7.0
+               Previously returned self.
         """
-        # Construct condor_submit_dag command
-        command = 'condor_submit_dag'
-        if submit_options is not None:
-            command += ' {}'.format(submit_options)
-        command += ' {}'.format(self.submit_file)
+        self._check_node_names()
+        result = submit_dag_file(self.submit_file,
+                                 submit_options=submit_options,
+                                 use_bindings=use_bindings)
+        return self._set_submit_result(result, 'condor_submit_dag')
+
+    async def submit_dag_async(self, submit_options=None, use_bindings=None,
+                               timeout=None, semaphore=None):
+        """Submits Dagman to condor without blocking the asyncio event loop
 
-        submit_dag_proc = subprocess.Popen(
-            split_command_string(command),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
+        .. versionadded:: 0.7.0
 
+        Parameters
+        ----------
+        submit_options : str, optional
+            Options to be passed to ``condor_submit_dag`` for this Dagman.
+            Submitting with options always uses the ``condor_submit_dag``
+            command.
+
+        use_bindings : bool or None, optional
+            Whether to submit through the HTCondor Python bindings (``True``)
+            or the ``condor_submit_dag`` command (``False``). Default is
+            ``None``, to use the bindings when they are available.
+
+        timeout : float or None, optional
+            Maximum number of seconds to wait for the submission, after which
+            ``asyncio.TimeoutError`` is raised and ``condor_submit_dag`` is
+            killed (default is ``None``, no timeout).
+
+        semaphore : asyncio.Semaphore, optional
+            Semaphore limiting the number of submissions in flight. Default
+            is a semaphore shared by all submissions in the event loop, see
+            ``pycondor.submit.set_max_concurrent_submissions``.
+
+        Returns
+        -------
+        result : SubmitResult
+            Result of the submission, which is also stored in
+            ``submit_result``.
+        """
+        # Getting the condor version may run condor_version
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._check_node_names)
+        result = await submit_dag_file_async(self.submit_file,
+                                             submit_options=submit_options,
+                                             use_bindings=use_bindings,
+                                             timeout=timeout,
+                                             semaphore=semaphore)
+        return self._set_submit_result(result, 'condor_submit_dag')
+
+    def _check_node_names(self):
         # Check that there are no illegal node names for newer condor versions
         condor_version = get_condor_version()
         if condor_version >= (8, 7, 2) and self._has_bad_node_names:
@@ -383,14 +1322,8 @@ class Dagman(BaseNode):
                 ),
             )
 
-        # Execute condor_submit_dag command
-        out, err = submit_dag_proc.communicate()
-        print(decode_string(out))
-
-        return self
-
-    @requires_command('condor_submit_dag')
-    def build_submit(self, makedirs=True, fancyname=True, submit_options=None):
+    def build_submit(self, makedirs=True, fancyname=True, submit_options=None,
+                     use_bindings=None):
         """Calls build and submit sequentially
 
         Parameters
@@ -411,13 +1344,21 @@ class Dagman(BaseNode):
             <http://research.cs.wisc.edu/htcondor/manual/current/condor_submit_dag.html>`_
             for possible options).
 
+        use_bindings : bool or None, optional
+            Whether to submit through the HTCondor Python bindings (``True``)
+            or the ``condor_submit_dag`` command (``False``). Default is
+            ``None``, to use the bindings when they are available.
+
+            .. versionadded:: 0.7.0
+
         Returns
         -------
         self : object
             Returns self.
         """
         self.build(makedirs, fancyname)
-        self.submit_dag(submit_options=submit_options)
+        self.submit_dag(submit_options=submit_options,
+                        use_bindings=use_bindings)
 
         return self
 
@@ -432,3 +1373,54 @@ class Dagman(BaseNode):
         """
         g = _visualize(self, filename=filename)
         return g
+
+    def save(self, path):
+        """Saves this Dagman and all of its nodes to a file
+
+        Saves the whole node graph (Job and Dagman attributes, Job
+        arguments, parent/child relationships and nested subdags) in a
+        compact, versioned format that can be loaded with ``Dagman.load``
+        without recreating the graph. Build results (e.g. submit
+        names) aren't saved, and neither are relationships with nodes outside
+        of this Dagman.
+
+        .. versionadded:: 0.7.0
+
+        Parameters
+        ----------
+        path : str
+            File to save to.
+
+        Examples
+        --------
+        >>> import pycondor
+        >>> dag = pycondor.Dagman('mydag')
+        >>> job = pycondor.Job('myjob', 'myscript.py', dag=dag)
+        >>> dag.save('mydag.pkl')
+        >>> dag = pycondor.Dagman.load('mydag.pkl')
+        """
+        serialize.save(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a Dagman saved with ``Dagman.save``
+
+        .. versionadded:: 0.7.0
+
+        Parameters
+        ----------
+        path : str
+            File to load.
+
+        Returns
+        -------
+        dagman : Dagman
+            Loaded Dagman, which needs to be built before being submitted.
+
+        Raises
+        ------
+        ValueError
+            If path isn't a file saved with ``Dagman.save``, or was saved with
+            a newer version of pycondor.
+        """
+        return serialize.load(path)
@@ -1,18 +1,58 @@
 
 import os
-import subprocess
+import itertools
 from collections import namedtuple
 try:
     from collections.abc import Iterable
 except ImportError:  # python < 3.3
     from collections import Iterable
 
-from .utils import (checkdir, string_rep, requires_command,
-                    split_command_string, decode_string)
-from .basenode import BaseNode
+from .utils import string_rep
+from .basenode import BaseNode, _BuildContext
+from .submit import submit_job_file, submit_job_file_async
 
 JobArg = namedtuple('JobArg', ['arg', 'name', 'retry'])
 
+# Source of the versions of _ArgList objects, unique across all of them
+_arg_list_versions = itertools.count()
+
+
+class _ArgList(list):
+    """List of Job arguments that keeps track of changes
+
+    Behaves like a regular ``list``, but gets a new ``version`` whenever it
+    is modified. Versions are unique across all argument lists, so a Job can
+    tell whether its arguments changed, or were replaced, since it last
+    looked at them.
+    """
+    def __init__(self, args=()):
+        super(_ArgList, self).__init__(args)
+        self.version = next(_arg_list_versions)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def _modified(self):
+        self.version = next(_arg_list_versions)
+
+
+def _add_version_bump(method_name):
+    method = getattr(list, method_name)
+
+    def modifying_method(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._modified()
+        return result
+
+    modifying_method.__name__ = method_name
+    setattr(_ArgList, method_name, modifying_method)
+
+
+for _method_name in ['__setitem__', '__delitem__', '__iadd__', '__imul__',
+                     'append', 'extend', 'insert', 'remove', 'pop', 'clear',
+                     'sort', 'reverse']:
+    _add_version_bump(_method_name)
+
 
 class Job(BaseNode):
     """
@@ -154,7 +194,9 @@ class Job(BaseNode):
             raise TypeError('retry must be an int')
         self.retry = retry
 
-        self.args = []
+        self.args = _ArgList()
+        self._expanded_node_names = None
+        self._expanded_node_names_key = None
         if arguments is not None:
             if isinstance(arguments, str):
                 self.add_arg(arguments)
@@ -164,11 +206,13 @@ class Job(BaseNode):
             else:
                 raise TypeError('arguments must be a string or an iterable')
 
-        self.logger.debug('{} initialized'.format(self.name))
+        self._debug('{} initialized', self.name)
 
     def __repr__(self):
         nondefaults = ''
-        default_attr = ['name', 'executable', 'logger']
+        default_attr = ['name', 'executable', '_logger', '_verbose',
+                        '_expanded_node_names',
+                        '_expanded_node_names_key']
         for attr in sorted(vars(self)):
             if getattr(self, attr) and attr not in default_attr:
                 nondefaults += ', {}={}'.format(attr, getattr(self, attr))
@@ -176,6 +220,16 @@ class Job(BaseNode):
             self.name, os.path.basename(self.executable), nondefaults)
         return output
 
+    @property
+    def args(self):
+        """List of ``JobArg`` arguments of the Job"""
+        return self.__dict__['args']
+
+    @args.setter
+    def args(self, args):
+        # Replacing the arguments gives them a new version
+        self.__dict__['args'] = _ArgList(args)
+
     def __iter__(self):
         return iter(self.args)
 
@@ -224,8 +278,7 @@ class Job(BaseNode):
         else:
             job_arg = JobArg(arg=arg, name=name, retry=self.retry)
         self.args.append(job_arg)
-        self.logger.debug('Added argument \'{}\' to Job {}'.format(arg,
-                                                                   self.name))
+        self._debug('Added argument \'{}\' to Job {}', arg, self.name)
 
         return self
 
@@ -248,7 +301,54 @@ class Job(BaseNode):
 
         return self
 
-    def _make_submit_script(self, makedirs=True, fancyname=True, indag=False):
+    def _get_expanded_node_names(self):
+        """Returns the DAG node name for each Job argument
+
+        The names are computed once and cached until the Job arguments
+        (added, edited in place, or replaced) or submit name (e.g. from a new
+        build) change. Note that the Job must be built before calling this
+        method.
+
+        Returns
+        -------
+        node_names : list
+            Node name for each argument in ``self.args``. This list shouldn't
+            be modified.
+        """
+        key = (self.submit_name, self.args.version)
+        if self._expanded_node_names_key != key:
+            node_names = []
+            for idx, job_arg in enumerate(self.args):
+                if job_arg.name is not None:
+                    node_name = '{}_{}'.format(self.submit_name, job_arg.name)
+                else:
+                    node_name = '{}_arg_{}'.format(self.submit_name, idx)
+                node_names.append(node_name)
+            self._expanded_node_names = node_names
+            self._expanded_node_names_key = key
+
+        return self._expanded_node_names
+
+    def _make_submit_script(self, makedirs=True, fancyname=True, indag=False,
+                            submit_name=None, context=None):
+        if context is None:
+            context = _BuildContext(makedirs, fancyname)
+        contents = self._get_submit_description(context, indag, submit_name)
+        context.write_file(self.submit_file, lambda f: f.write(contents))
+
+        return
+
+    def _get_submit_description(self, context, indag=False, submit_name=None,
+                                job_name_macro=False):
+        """Renders the submit description for this Job
+
+        Also sets the submit name, submit file, and log/output/error file
+        attributes of the Job. If job_name_macro is True, log, output, and
+        error files are always named after the ``$(job_name)`` macro rather
+        than the submit name, so Jobs that only differ in name and arguments
+        get identical submit descriptions (the macro must then be defined
+        for every DAG node).
+        """
 
         # Retrying failed nodes is only available to Jobs in a Dagman
         self._has_arg_retries = any([job_arg.retry for job_arg in self.args])
@@ -261,7 +361,7 @@ class Job(BaseNode):
         # Check that paths/files exist
         for directory in [self.submit, self.log, self.output, self.error]:
             if directory is not None:
-                checkdir(directory + '/', makedirs)
+                context.checkdir(directory + '/')
 
         lines = []
         submit_attrs = ['universe', 'executable', 'request_memory',
@@ -272,15 +372,20 @@ class Job(BaseNode):
                 submit_attr_str = string_rep(getattr(self, submit_attr))
                 lines.append('{} = {}'.format(submit_attr, submit_attr_str))
 
-        name = self._get_fancyname() if fancyname else self.name
+        if submit_name is not None:
+            name = submit_name
+        else:
+            name = context.get_submit_name(self)
         self.submit_name = name
         submit_file = os.path.join(self.submit, '{}.submit'.format(name))
-        checkdir(submit_file, makedirs)
+        context.checkdir(submit_file)
         # Add submit_file data member to job for later use
         self.submit_file = submit_file
 
         # Set up log, output, and error files paths
         self._has_arg_names = any([arg.name for arg in self.args])
+        self._job_name_macro = job_name_macro
+        use_job_name = self._has_arg_names or job_name_macro
         for attr in ['log', 'output', 'error']:
             dir_env_var = os.getenv('PYCONDOR_{}_DIR'.format(attr.upper()))
             if getattr(self, attr) is not None:
@@ -291,7 +396,7 @@ class Job(BaseNode):
                 continue
 
             # Add log/output/error files to submit file lines
-            if self._has_arg_names:
+            if use_job_name:
                 file_path = os.path.join(dir_path,
                                          '$(job_name).{}'.format(attr))
             else:
@@ -299,7 +404,7 @@ class Job(BaseNode):
                                          '{}.{}'.format(name, attr))
             lines.append('{} = {}'.format(attr, file_path))
             setattr(self, '{}_file'.format(attr), file_path)
-            checkdir(file_path, makedirs)
+            context.checkdir(file_path)
 
         # Add any extra lines to submit file, if specified
         if self.extra_lines:
@@ -313,45 +418,61 @@ class Job(BaseNode):
         if indag:
             if len(self.args) > 0:
                 lines.append('arguments = $(ARGS)')
-            if self._has_arg_names:
+            if use_job_name:
                 lines.append('job_name = $(job_name)')
             if self.queue:
                 lines.append('queue {}'.format(self.queue))
             else:
                 lines.append('queue')
         else:
-            if self.args and self.queue:
-                if len(self.args) > 1:
-                    raise NotImplementedError(
-                        'At this time multiple arguments and queue values '
-                        'are only supported through Dagman')
-                else:
-                    arg = self.args[0].arg
-                    lines.append('arguments = {}'.format(string_rep(arg,
-                                                         quotes=True)))
-                    lines.append('queue {}'.format(self.queue))
-            # Any arguments supplied will be taken care of via the queue line
+            if len(self.args) > 1:
+                # Read the arguments (and job names) of each job from an
+                # itemdata file, so the size of the submit file doesn't grow
+                # with the number of arguments
+                itemdata_file = os.path.join(self.submit,
+                                             '{}.args'.format(name))
+                lines.append('arguments = $(ARGS)')
+                variables = 'job_name,ARGS' if self._has_arg_names else 'ARGS'
+                queue = '{} '.format(self.queue) if self.queue else ''
+                lines.append('queue {}{} from {}'.format(queue, variables,
+                                                         itemdata_file))
+                context.write_file(
+                    itemdata_file, lambda f: self._write_itemdata(f, name))
+                self.itemdata_file = itemdata_file
+            elif self.args and self.queue:
+                arg = self.args[0].arg
+                lines.append('arguments = {}'.format(string_rep(arg,
+                                                     quotes=True)))
+                lines.append('queue {}'.format(self.queue))
             elif self.args:
-                for arg, arg_name, _ in self.args:
-                    lines.append('arguments = {}'.format(arg))
-                    if not self._has_arg_names:
-                        pass
-                    elif arg_name is not None:
-                        lines.append('job_name = {}_{}'.format(name, arg_name))
-                    else:
-                        lines.append('job_name = {}'.format(name))
-                    lines.append('queue')
+                arg, arg_name, _ = self.args[0]
+                lines.append('arguments = {}'.format(arg))
+                if not self._has_arg_names:
+                    pass
+                elif arg_name is not None:
+                    lines.append('job_name = {}_{}'.format(name, arg_name))
+                else:
+                    lines.append('job_name = {}'.format(name))
+                lines.append('queue')
             elif self.queue:
                 lines.append('queue {}'.format(self.queue))
             else:
                 lines.append('queue')
 
-        with open(submit_file, 'w') as f:
-            f.writelines('\n'.join(lines))
+        return '\n'.join(lines)
 
-        return
+    def _write_itemdata(self, f, name):
+        # Writes one line per argument, with the job name first if there are
+        # arg names (the last queue variable gets the rest of the line)
+        for arg, arg_name, _ in self.args:
+            if not self._has_arg_names:
+                f.write('{}\n'.format(arg))
+            elif arg_name is not None:
+                f.write('{}_{}, {}\n'.format(name, arg_name, arg))
+            else:
+                f.write('{}, {}\n'.format(name, arg))
 
-    def build(self, makedirs=True, fancyname=True):
+    def build(self, makedirs=True, fancyname=True, backend=None):
         """Build and saves the submit file for Job
 
         Parameters
@@ -366,15 +487,28 @@ class Job(BaseNode):
             file becomes ``jobname_YYYYMMD_id``. This is useful when running
             several Jobs of the same name (default is ``True``).
 
+        backend : FileBackend or MemoryBackend, optional
+            Backend to write files to. For example, use a ``MemoryBackend`` to
+            render the submit file in memory without writing anything to disk
+            (default is ``None``, a ``FileBackend``).
+
+            .. versionadded:: 0.7.0
+
         Returns
         -------
         self : object
             Returns self.
 
         """
+        context = _BuildContext(makedirs, fancyname, backend=backend)
+        return self._build(context)
+
+    def _build(self, context):
+        # Builds a standalone Job, possibly sharing context with other Jobs
         self.logger.info(
             'Building submission file for Job {}...'.format(self.name))
-        self._make_submit_script(makedirs, fancyname, indag=False)
+        self._make_submit_script(context.makedirs, context.fancyname,
+                                 indag=False, context=context)
         self._built = True
         if len(self.args) >= 10:
             self.logger.warning('You are submitting a Job with {} arguments. '
@@ -386,18 +520,18 @@ class Job(BaseNode):
 
         return self
 
-    def _build_from_dag(self, makedirs=True, fancyname=True):
-        self.logger.debug(
-            'Building submission file for Job {}...'.format(self.name))
-        self._make_submit_script(makedirs, fancyname, indag=True)
+    def _build_from_dag(self, makedirs=True, fancyname=True,
+                        submit_name=None, context=None):
+        self._debug('Building submission file for Job {}...', self.name)
+        self._make_submit_script(makedirs, fancyname, indag=True,
+                                 submit_name=submit_name, context=context)
         self._built = True
-        self.logger.debug('Condor submission file for {} successfully '
-                          'built!'.format(self.name))
+        self._debug('Condor submission file for {} successfully built!',
+                    self.name)
 
         return
 
-    @requires_command('condor_submit')
-    def submit_job(self, submit_options=None):
+    def submit_job(self, submit_options=None, use_bindings=None):
         """Submits Job to condor
 
         Parameters
@@ -406,12 +540,25 @@ class Job(BaseNode):
             Options to be passed to ``condor_submit`` for this Job
             (see the `condor_submit documentation
             <http://research.cs.wisc.edu/htcondor/manual/current/condor_submit.html>`_
-            for possible options).
+            for possible options). Submitting with options always uses the
+            ``condor_submit`` command.
+
+        use_bindings : bool or None, optional
+            Whether to submit through the HTCondor Python bindings, using a
+            single Schedd connection shared by all submissions (``True``), or
+            the ``condor_submit`` command (``False``). Default is ``None``, to
+            use the bindings when the ``htcondor`` module can be imported.
+
+            .. versionadded:: 0.7.0
 
         Returns
         -------
-        self : object
-            Returns self.
+        result : SubmitResult
+            Cluster ID, number of procs, return code, output and error output
+            of the submission, which is also stored in ``submit_result``.
+
+            .. versionchanged:: 0.7.0
+               Previously returned self.
 
         Examples
         --------
@@ -420,6 +567,63 @@ class Job(BaseNode):
         >>> job.build()
         >>> job.submit_job(submit_options='-maxjobs 1000 -interactive')
         """
+        self._check_submittable()
+        result = submit_job_file(self.submit_file,
+                                 submit_options=submit_options,
+                                 use_bindings=use_bindings)
+        return self._set_submit_result(result, 'condor_submit')
+
+    async def submit_job_async(self, submit_options=None, use_bindings=None,
+                               timeout=None, semaphore=None):
+        """Submits Job to condor without blocking the asyncio event loop
+
+        .. versionadded:: 0.7.0
+
+        Parameters
+        ----------
+        submit_options : str, optional
+            Options to be passed to ``condor_submit`` for this Job.
+            Submitting with options always uses the ``condor_submit``
+            command.
+
+        use_bindings : bool or None, optional
+            Whether to submit through the HTCondor Python bindings (``True``)
+            or the ``condor_submit`` command (``False``). Default is
+            ``None``, to use the bindings when they are available.
+
+        timeout : float or None, optional
+            Maximum number of seconds to wait for the submission, after which
+            ``asyncio.TimeoutError`` is raised and ``condor_submit`` is
+            killed (default is ``None``, no timeout).
+
+        semaphore : asyncio.Semaphore, optional
+            Semaphore limiting the number of submissions in flight. Default
+            is a semaphore shared by all submissions in the event loop, see
+            ``pycondor.submit.set_max_concurrent_submissions``.
+
+        Returns
+        -------
+        result : SubmitResult
+            Result of the submission, which is also stored in
+            ``submit_result``.
+
+        Examples
+        --------
+        >>> import asyncio
+        >>> import pycondor
+        >>> job = pycondor.Job('myjob', 'myscript.py')
+        >>> job.build()
+        >>> result = asyncio.run(job.submit_job_async(timeout=60))
+        """
+        self._check_submittable()
+        result = await submit_job_file_async(self.submit_file,
+                                             submit_options=submit_options,
+                                             use_bindings=use_bindings,
+                                             timeout=timeout,
+                                             semaphore=semaphore)
+        return self._set_submit_result(result, 'condor_submit')
+
+    def _check_submittable(self):
         # Ensure that submit file has been written
         if not self._built:
             raise ValueError('build() must be called before submit()')
@@ -432,23 +636,8 @@ class Job(BaseNode):
             raise ValueError('Attempting to submit a Job with children. '
                              'Interjob relationships requires Dagman.')
 
-        # Construct and execute condor_submit command
-        command = 'condor_submit'
-        if submit_options is not None:
-            command += ' {}'.format(submit_options)
-        command += ' {}'.format(self.submit_file)
-
-        proc = subprocess.Popen(
-            split_command_string(command),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
-        out, err = proc.communicate()
-        print(decode_string(out))
-
-        return self
-
-    @requires_command('condor_submit')
-    def build_submit(self, makedirs=True, fancyname=True, submit_options=None):
+    def build_submit(self, makedirs=True, fancyname=True, submit_options=None,
+                     use_bindings=None):
         """Calls build and submit sequentially
 
         Parameters
@@ -469,12 +658,20 @@ class Job(BaseNode):
             <http://research.cs.wisc.edu/htcondor/manual/current/condor_submit.html>`_
             for possible options).
 
+        use_bindings : bool or None, optional
+            Whether to submit through the HTCondor Python bindings (``True``)
+            or the ``condor_submit`` command (``False``). Default is
+            ``None``, to use the bindings when they are available.
+
+            .. versionadded:: 0.7.0
+
         Returns
         -------
         self : object
             Returns self.
         """
         self.build(makedirs, fancyname)
-        self.submit_job(submit_options=submit_options)
+        self.submit_job(submit_options=submit_options,
+                        use_bindings=use_bindings)
 
         return self
@@ -0,0 +1,374 @@
+"""Saving and loading of Dagman graphs
+
+A Dagman and all of its nodes (including nested subdags) are stored as a
+pickle containing only built-in types, in a columnar layout. Nodes with the
+same kind (Job or Dagman) and attribute names form a group, which stores
+each attribute name once, and one column per attribute: a table of the
+distinct values, each stored once, and the index of each node's value in
+the table as a flat array packed into bytes. Job arguments are stored the
+same way, in one column per ``JobArg`` field, and the parent/child
+relationships and the nodes of each Dagman are stored as flat arrays of
+node indices. Files are loaded with an unpickler that refuses to load
+anything else, so loading a file can't run arbitrary code.
+"""
+import gc
+import sys
+import itertools
+import pickle
+from array import array
+from contextlib import contextmanager
+
+from .basenode import NodeList
+from .job import Job, JobArg, _ArgList
+
+FORMAT_NAME = 'pycondor-dagman'
+FORMAT_VERSION = 2
+
+# Attributes that aren't saved as they are. Nodes are saved as node indices,
+# while the other attributes are set when building, or only cache other
+# attributes, so they aren't saved (loaded graphs always need to be built).
+_UNSAVED_ATTRS = frozenset([
+    'parents', 'children', 'dag', 'nodes',
+    '_logger', '_built', '_node_names', '_expanded_node_names',
+    '_expanded_node_names_key',
+    '_has_arg_names', '_has_arg_retries', '_job_name_macro',
+    '_has_bad_node_names', 'build_stats', 'submit_name', 'submit_file',
+    'log_file', 'output_file', 'error_file', 'itemdata_file',
+    'submit_result',
+])
+
+_BUILTIN_TYPES = frozenset([str, bytes, bool, int, float, type(None)])
+_CONTAINER_TYPES = frozenset([list, tuple, set, frozenset])
+
+# Typecode of the arrays used for node indices
+_INDEX_TYPECODE = 'i'
+
+# Typecodes of the arrays of indices in the value tables of columns, from
+# smallest to largest
+_CODE_TYPECODES = ('B', 'H', 'I', 'L')
+
+
+class _UnsupportedTypeError(TypeError):
+    pass
+
+
+class _Pickler(pickle.Pickler):
+    # Refuses to pickle anything the unpickler can't load. The C pickler
+    # handles built-in types without calling reducer_override.
+
+    def reducer_override(self, obj):
+        if type(obj) in _BUILTIN_TYPES or type(obj) in _CONTAINER_TYPES \
+                or type(obj) is dict:
+            return NotImplemented
+        raise _UnsupportedTypeError(type(obj))
+
+
+class _Unpickler(pickle.Unpickler):
+    # Only built-in types, which don't need find_class, can be loaded
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(
+            'Saved Dagman files can only contain built-in types, '
+            'found {}.{}'.format(module, name))
+
+
+@contextmanager
+def _gc_paused():
+    # Saving and loading create a lot of objects that all stay alive, so
+    # garbage collections triggered in the meantime would only waste time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _check_value(value, attr, node):
+    # Checks that value only contains types the unpickler can load.
+    # Subclasses (e.g. namedtuples) would need to be loaded by name.
+    value_type = type(value)
+    if value_type in _BUILTIN_TYPES:
+        return
+    elif value_type in _CONTAINER_TYPES:
+        for item in value:
+            if type(item) not in _BUILTIN_TYPES:
+                _check_value(item, attr, node)
+    elif value_type is dict:
+        for key, item in value.items():
+            _check_value(key, attr, node)
+            _check_value(item, attr, node)
+    else:
+        raise TypeError('Cannot save attribute {} of {}, which contains an '
+                        'object of type {}'.format(attr, node.name,
+                                                   type(value)))
+
+
+def _pack_node_lists(node_lists, index):
+    # Packs the indices of the nodes in each of node_lists into bytes.
+    # Nodes that aren't being saved are dropped.
+    counts = array(_INDEX_TYPECODE)
+    indices = array(_INDEX_TYPECODE)
+    for nodes in node_lists:
+        n_indices = len(indices)
+        indices.extend(index[node] for node in nodes if node in index)
+        counts.append(len(indices) - n_indices)
+    return counts.tobytes(), indices.tobytes()
+
+
+def _unpack_node_lists(packed, nodes, byteorder):
+    # Inverse of _pack_node_lists
+    arrays = []
+    for data in packed:
+        values = array(_INDEX_TYPECODE)
+        values.frombytes(data)
+        if byteorder != sys.byteorder:
+            values.byteswap()
+        arrays.append(values)
+    counts, indices = arrays
+
+    flat_nodes = list(map(nodes.__getitem__, indices))
+    node_lists = []
+    start = 0
+    for count in counts:
+        node_lists.append(NodeList._from_unique(
+            flat_nodes[start:start + count]))
+        start += count
+    return node_lists
+
+
+def _get_saved_nodes(dagman):
+    # Returns dagman followed by all the nodes in its hierarchy
+    from .dagman import Dagman
+    nodes = [dagman]
+    index = {dagman: 0}
+    for node in nodes:
+        if isinstance(node, Dagman):
+            for child in node.nodes:
+                if child not in index:
+                    index[child] = len(nodes)
+                    nodes.append(child)
+    return nodes, index
+
+
+def save(dagman, path):
+    """Saves dagman, and all the nodes in its hierarchy, to path
+
+    Parameters
+    ----------
+    dagman : Dagman
+        Dagman to save.
+    path : str
+        File to save to.
+    """
+    from .dagman import Dagman
+    if not isinstance(dagman, Dagman):
+        raise TypeError('Expecting a Dagman object, '
+                        'got {}'.format(type(dagman)))
+    with _gc_paused():
+        _save(dagman, path)
+
+
+def _pack_array(values, typecode=_INDEX_TYPECODE):
+    return array(typecode, values).tobytes()
+
+
+def _unpack_array(data, byteorder, typecode=_INDEX_TYPECODE):
+    values = array(typecode)
+    values.frombytes(data)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+
+def _pack_column(values):
+    # Returns the table of distinct values, the typecode of the array of
+    # indices in the table, and the index in the table of each of values
+    # packed into bytes (None when all values are the same). Unhashable
+    # values are only shared if they are the same object.
+    table = []
+    table_index = {}
+    codes = []
+    for value in values:
+        try:
+            key = (type(value), value)
+            code = table_index.get(key)
+        except TypeError:
+            key = id(value)
+            code = table_index.get(key)
+        if code is None:
+            code = table_index[key] = len(table)
+            table.append(value)
+        codes.append(code)
+    if len(table) <= 1:
+        return table, None, None
+    for typecode in _CODE_TYPECODES:
+        if len(table) <= 1 << (8 * array(typecode).itemsize):
+            break
+    return table, typecode, _pack_array(codes, typecode)
+
+
+def _unpack_column(column, n_values, byteorder):
+    # Inverse of _pack_column, for a column of n_values values
+    table, typecode, codes = column
+    if codes is None:
+        return table * n_values
+    return list(map(table.__getitem__,
+                    _unpack_array(codes, byteorder, typecode)))
+
+
+def _save(dagman, path):
+    from .dagman import Dagman
+    nodes, index = _get_saved_nodes(dagman)
+    kinds = []
+    groups = {}
+    job_args = []
+    dagmans = []
+    for node in nodes:
+        node_attrs = {attr: value for attr, value in vars(node).items()
+                      if attr not in _UNSAVED_ATTRS}
+        if isinstance(node, Job):
+            kind = 'J'
+            del node_attrs['args']
+            job_args.append(node.args)
+        elif isinstance(node, Dagman):
+            kind = 'D'
+            dagmans.append(node)
+        else:
+            raise TypeError('Nodes must be either a Job or Dagman object')
+        kinds.append(kind)
+        group = groups.setdefault((kind, tuple(node_attrs)), ([], []))
+        group[0].append(index[node])
+        group[1].append(tuple(node_attrs.values()))
+
+    packed_groups = []
+    for (kind, attr_names), (indices, rows) in groups.items():
+        columns = [_pack_column(values) for values in zip(*rows)]
+        packed_groups.append((kind, attr_names, _pack_array(indices),
+                              columns))
+    flat_args = [job_arg for args in job_args for job_arg in args]
+    arg_columns = [_pack_column(job_arg[i] for job_arg in flat_args)
+                   for i in range(len(JobArg._fields))]
+
+    data = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'itemsize': array(_INDEX_TYPECODE).itemsize,
+        'kinds': ''.join(kinds),
+        'groups': packed_groups,
+        'args': (_pack_array(map(len, job_args)), arg_columns),
+        'dag': _pack_array(index.get(node.dag, -1) for node in nodes),
+        'parents': _pack_node_lists((node.parents for node in nodes), index),
+        'children': _pack_node_lists((node.children for node in nodes),
+                                     index),
+        'nodes': _pack_node_lists((node.nodes for node in dagmans), index),
+    }
+    with open(path, 'wb') as f:
+        try:
+            _Pickler(f, protocol=4).dump(data)
+        except _UnsupportedTypeError:
+            # Find the offending attribute, for a more helpful error
+            for node in nodes:
+                for attr, value in vars(node).items():
+                    if attr == 'args':
+                        value = list(map(tuple, value))
+                    if attr not in _UNSAVED_ATTRS:
+                        _check_value(value, attr, node)
+            raise
+
+
+def load(path):
+    """Loads a Dagman saved with ``save``
+
+    Parameters
+    ----------
+    path : str
+        File to load.
+
+    Returns
+    -------
+    dagman : Dagman
+        Loaded Dagman. It, and all the nodes in its hierarchy, need to be
+        built before being submitted.
+    """
+    with _gc_paused():
+        return _load(path)
+
+
+def _load(path):
+    from .dagman import Dagman
+    with open(path, 'rb') as f:
+        try:
+            data = _Unpickler(f).load()
+        except (pickle.UnpicklingError, EOFError) as error:
+            raise ValueError('{} is not a saved Dagman file: '
+                             '{}'.format(path, error)) from error
+    if not isinstance(data, dict) or data.get('format') != FORMAT_NAME:
+        raise ValueError('{} is not a saved Dagman file'.format(path))
+    if data['version'] > FORMAT_VERSION:
+        raise ValueError('{} was saved with a newer version of pycondor '
+                         '(format version {}, expecting at most '
+                         '{})'.format(path, data['version'], FORMAT_VERSION))
+    if data['version'] < FORMAT_VERSION:
+        raise ValueError('{} was saved with an unsupported older format '
+                         '(format version {})'.format(path, data['version']))
+    if data['itemsize'] != array(_INDEX_TYPECODE).itemsize:
+        raise ValueError('{} was saved on an incompatible '
+                         'platform'.format(path))
+    byteorder = data['byteorder']
+
+    # Create nodes without calling __init__, which would redo all the
+    # argument checks. Loggers are created when first used.
+    nodes = [None] * len(data['kinds'])
+    for kind, attr_names, indices, columns in data['groups']:
+        node_class = Job if kind == 'J' else Dagman
+        new = node_class.__new__
+        indices = _unpack_array(indices, byteorder)
+        columns = [_unpack_column(column, len(indices), byteorder)
+                   for column in columns]
+        for i, values in zip(indices, zip(*columns)):
+            node = new(node_class)
+            node.__dict__ = dict(zip(attr_names, values))
+            nodes[i] = node
+
+    counts, arg_columns = data['args']
+    counts = _unpack_array(counts, byteorder)
+    n_args = sum(counts)
+    flat_args = list(map(tuple.__new__, itertools.repeat(JobArg),
+                         zip(*[_unpack_column(column, n_args, byteorder)
+                               for column in arg_columns])))
+    jobs = []
+    dagmans = []
+    for node in nodes:
+        (jobs if type(node) is Job else dagmans).append(node)
+    start = 0
+    for job, count in zip(jobs, counts):
+        node_attrs = job.__dict__
+        node_attrs['args'] = _ArgList(flat_args[start:start + count])
+        node_attrs['_expanded_node_names'] = None
+        node_attrs['_expanded_node_names_key'] = None
+        start += count
+    for dagman in dagmans:
+        dagman._has_bad_node_names = False
+        dagman.build_stats = {}
+
+    dags = _unpack_array(data['dag'], byteorder)
+    parents = _unpack_node_lists(data['parents'], nodes, byteorder)
+    children = _unpack_node_lists(data['children'], nodes, byteorder)
+    dag_nodes = _unpack_node_lists(data['nodes'], nodes, byteorder)
+    for node, dag, node_parents, node_children in zip(nodes, dags, parents,
+                                                      children):
+        node_attrs = node.__dict__
+        node_attrs['_logger'] = None
+        node_attrs['_built'] = False
+        node_attrs['submit_result'] = None
+        node_attrs['dag'] = nodes[dag] if dag >= 0 else None
+        node_attrs['parents'] = node_parents
+        node_attrs['children'] = node_children
+    for dagman, nodes_of_dagman in zip(dagmans, dag_nodes):
+        dagman.nodes = nodes_of_dagman
+        dagman._node_names = {child.name: child for child in dagman.nodes}
+
+    return nodes[0]
@@ -0,0 +1,547 @@
+"""Submission of built Jobs and Dagmans to HTCondor
+
+When the HTCondor Python bindings (the ``htcondor`` module) are available,
+submit descriptions are submitted directly to the schedd through a single
+``Schedd`` connection that is shared by all submissions. This avoids
+starting a ``condor_submit`` process, and authenticating with the schedd,
+for every submission. Otherwise, or when command line submit options are
+given, the ``condor_submit`` and ``condor_submit_dag`` commands are used.
+
+Asynchronous variants, for use in an asyncio event loop, run the commands as
+asyncio subprocesses, or the bindings in the default executor, so they don't
+block the event loop. The number of asynchronous submissions in flight at
+the same time is limited by a semaphore.
+"""
+import re
+import asyncio
+import functools
+import subprocess
+import threading
+import weakref
+from collections import namedtuple
+
+from .utils import assert_command_exists, split_command_string, decode_string
+
+# Maximum number of condor_submit processes run at the same time by
+# submit_jobs
+_MAX_SUBMIT_PROCESSES = 8
+
+# Line printed by condor_submit for each cluster submitted
+_CLUSTER_LINE = re.compile(r'(\d+) job\(s\) submitted to cluster (\d+)\.')
+
+
+class SubmitResult(namedtuple('SubmitResult', ['cluster_id', 'n_procs',
+                                               'returncode', 'stdout',
+                                               'stderr'])):
+    """Result of submitting a Job or Dagman
+
+    Returned by ``Job.submit_job`` and ``Dagman.submit_dag``, and stored in
+    the ``submit_result`` attribute of the submitted node.
+
+    .. versionadded:: 0.7.0
+
+    Attributes
+    ----------
+    cluster_id : int or None
+        ID of the cluster submitted, or ``None`` if nothing was submitted.
+        For a Dagman, this is the cluster of the DAGMan job.
+    n_procs : int
+        Number of jobs (procs) submitted in the cluster.
+    returncode : int
+        Exit code of ``condor_submit`` or ``condor_submit_dag``. When
+        submitting through the Python bindings, 0, or 1 for a Job that
+        ``submit_jobs`` failed to submit.
+    stdout : str
+        Output of the submission.
+    stderr : str
+        Error output of the submission.
+    """
+    __slots__ = ()
+
+
+# Persistent connection to the schedd, created when first needed
+_schedd = None
+_schedd_lock = threading.Lock()
+
+# Default maximum number of asynchronous submissions in flight, and the
+# semaphore enforcing it in each event loop
+_max_concurrent_submissions = 8
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_htcondor():
+    # Returns the htcondor module, or None if the bindings aren't installed
+    try:
+        import htcondor
+    except ImportError:
+        return None
+    return htcondor
+
+
+def get_schedd():
+    """Returns the ``Schedd`` used to submit through the Python bindings
+
+    The connection is created the first time it is needed and then reused
+    for all later submissions.
+
+    .. versionadded:: 0.7.0
+
+    Returns
+    -------
+    schedd : htcondor.Schedd or None
+        Schedd connection, or ``None`` if the ``htcondor`` module can't be
+        imported and no Schedd was set with ``set_schedd``.
+    """
+    global _schedd
+    with _schedd_lock:
+        if _schedd is None:
+            htcondor = _get_htcondor()
+            if htcondor is None:
+                return None
+            _schedd = htcondor.Schedd()
+        return _schedd
+
+
+def set_schedd(schedd):
+    """Sets the ``Schedd`` used to submit through the Python bindings
+
+    For example, to submit to a remote schedd, or to a fake Schedd in tests.
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    schedd : htcondor.Schedd or None
+        Schedd to submit to. ``None`` drops the current connection, so a new
+        one is created the next time it is needed.
+    """
+    global _schedd
+    with _schedd_lock:
+        _schedd = schedd
+
+
+def _use_bindings(use_bindings, submit_options):
+    # Decides whether to submit through the bindings or the command line
+    if use_bindings is False:
+        return False
+    if submit_options is not None:
+        if use_bindings:
+            raise ValueError('submit_options can only be used when '
+                             'submitting with the command line tools')
+        return False
+    available = _get_htcondor() is not None
+    if use_bindings and not available:
+        raise ImportError('The htcondor Python bindings are required to '
+                          'submit with use_bindings=True')
+    return available
+
+
+def _run_command(command, submit_files, submit_options=None):
+    # Runs a condor submit command on submit_files. Returns the return code,
+    # output and error output.
+    assert_command_exists(command)
+    command = [command]
+    if submit_options is not None:
+        command.extend(split_command_string(submit_options))
+    command.extend(submit_files)
+    proc = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    return proc.returncode, decode_string(out), decode_string(err)
+
+
+def _parse_command_output(returncode, out, err):
+    # Returns a SubmitResult for each cluster reported in condor_submit
+    # output, in order
+    return [SubmitResult(int(cluster), int(n_procs), returncode, out, err)
+            for n_procs, cluster in _CLUSTER_LINE.findall(out)]
+
+
+def _command_result(returncode, out, err):
+    # Returns the SubmitResult of a command that submitted a single file
+    results = _parse_command_output(returncode, out, err)
+    if results:
+        return results[-1]
+    return SubmitResult(None, 0, returncode, out, err)
+
+
+def _bindings_result(result):
+    # Converts a bindings SubmitResult, with output like condor_submit's
+    out = '{} job(s) submitted to cluster {}.'.format(result.num_procs(),
+                                                      result.cluster())
+    return SubmitResult(result.cluster(), result.num_procs(), 0, out, '')
+
+
+def submit_job_file(submit_file, submit_options=None, use_bindings=None):
+    """Submits a Job submit file
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    submit_file : str
+        Path of the submit file.
+    submit_options : str, optional
+        Options to be passed to ``condor_submit``. Submitting with options
+        always uses the ``condor_submit`` command.
+    use_bindings : bool or None, optional
+        Whether to submit through the Python bindings (``True``) or the
+        ``condor_submit`` command (``False``). Default is ``None``, to use the
+        bindings when they are available.
+
+    Returns
+    -------
+    result : SubmitResult
+        Result of the submission.
+    """
+    if not _use_bindings(use_bindings, submit_options):
+        return _command_result(*_run_command('condor_submit', [submit_file],
+                                             submit_options))
+    return _bindings_result(
+        _submit_description(_read_description(submit_file)))
+
+
+def _read_description(submit_file):
+    with open(submit_file, 'r') as f:
+        return f.read()
+
+
+def _submit_description(description):
+    # Submits a submit description through the persistent Schedd connection
+    htcondor = _get_htcondor()
+    return get_schedd().submit(htcondor.Submit(description))
+
+
+def submit_dag_file(submit_file, submit_options=None, use_bindings=None):
+    """Submits a DAG file
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    submit_file : str
+        Path of the DAG file.
+    submit_options : str, optional
+        Options to be passed to ``condor_submit_dag``. Submitting with
+        options always uses the ``condor_submit_dag`` command.
+    use_bindings : bool or None, optional
+        Whether to submit through the Python bindings (``True``) or the
+        ``condor_submit_dag`` command (``False``). Default is ``None``, to
+        use the bindings when they are available.
+
+    Returns
+    -------
+    result : SubmitResult
+        Result of the submission.
+    """
+    if not _use_bindings(use_bindings, submit_options):
+        return _command_result(*_run_command('condor_submit_dag',
+                                             [submit_file], submit_options))
+    htcondor = _get_htcondor()
+    return _bindings_result(
+        get_schedd().submit(htcondor.Submit.from_dag(submit_file)))
+
+
+def submit_jobs(jobs, makedirs=True, fancyname=True, submit_options=None,
+                use_bindings=None):
+    """Builds and submits many standalone Jobs at once
+
+    Jobs that haven't been built yet are built first, sharing a single build
+    (so, for example, each submit directory is only listed once for fancy
+    names). All Jobs are then submitted together: through the persistent
+    Schedd connection of the Python bindings, or otherwise by running
+    ``condor_submit`` on each submit file, several at a time (since
+    ``condor_submit`` takes a single submit description file).
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    jobs : list of Job
+        Jobs to submit. They can't have any parents or children.
+    makedirs : bool, optional
+        If Job directories (e.g. error, output, log, submit) don't exist,
+        create them (default is ``True``).
+    fancyname : bool, optional
+        Appends the date and unique id number to error, log, output, and
+        submit files of Jobs that are built (default is ``True``).
+    submit_options : str, optional
+        Options to be passed to ``condor_submit`` for all the Jobs.
+        Submitting with options always uses the ``condor_submit`` command.
+    use_bindings : bool or None, optional
+        Whether to submit through the Python bindings (``True``) or the
+        ``condor_submit`` command (``False``). Default is ``None``, to use the
+        bindings when they are available.
+
+    Returns
+    -------
+    cluster_ids : list of int
+        Cluster ID of each of jobs, in the same order. The ``SubmitResult``
+        of each Job is stored in its ``submit_result`` attribute.
+
+    Raises
+    ------
+    RuntimeError
+        If submitting failed for any of the Jobs. All the other Jobs are
+        still submitted, and every Job has its ``submit_result`` set.
+
+    Examples
+    --------
+    >>> import pycondor
+    >>> jobs = [pycondor.Job('job_{}'.format(i), 'myscript.py')
+    ...         for i in range(100)]
+    >>> cluster_ids = pycondor.submit_jobs(jobs)
+    """
+    from .job import Job
+    from .basenode import _BuildContext
+
+    jobs = list(jobs)
+    for job in jobs:
+        if not isinstance(job, Job):
+            raise TypeError('Expecting a Job object, '
+                            'got {}'.format(type(job)))
+        if len(job.parents) != 0 or len(job.children) != 0:
+            raise ValueError('Job {} has parents or children. Interjob '
+                             'relationships requires Dagman.'.format(job.name))
+    if len(set(jobs)) != len(jobs):
+        raise ValueError('Each Job can only be submitted once')
+
+    context = _BuildContext(makedirs, fancyname)
+    for job in jobs:
+        if not job._built:
+            job._build(context)
+
+    if _use_bindings(use_bindings, submit_options):
+        # Jobs are submitted one after another over the single persistent
+        # Schedd connection
+        method = 'the Python bindings'
+        results = [_submit_with_bindings(job.submit_file) for job in jobs]
+    else:
+        method = 'condor_submit'
+
+        def submit_file(job):
+            return _command_result(*_run_command('condor_submit',
+                                                 [job.submit_file],
+                                                 submit_options))
+
+        results = context.map(submit_file, jobs,
+                              workers=_MAX_SUBMIT_PROCESSES)
+
+    failed = []
+    for job, result in zip(jobs, results):
+        print(result.stdout)
+        job.submit_result = result
+        if result.returncode != 0 or result.cluster_id is None:
+            failed.append(job)
+    if failed:
+        raise RuntimeError(
+            'Submitting with {} failed for {} of {} Jobs (first for {}): '
+            '{}'.format(method, len(failed), len(jobs),
+                        failed[0].submit_file,
+                        failed[0].submit_result.stderr.strip()))
+    return [job.submit_result.cluster_id for job in jobs]
+
+
+def _submit_with_bindings(submit_file):
+    # Submits submit_file through the bindings. Errors are returned as a
+    # SubmitResult with return code 1 and the error as error output.
+    try:
+        return _bindings_result(
+            _submit_description(_read_description(submit_file)))
+    except Exception as error:
+        return SubmitResult(None, 0, 1, '', '{}: {}'.format(
+            type(error).__name__, error))
+
+
+def set_max_concurrent_submissions(n):
+    """Sets the default maximum number of asynchronous submissions in flight
+
+    Applies to submissions started with ``Job.submit_job_async``,
+    ``Dagman.submit_dag_async``, ``submit_job_file_async`` and
+    ``submit_dag_file_async`` without an explicit semaphore. The default is
+    8 submissions at a time (per event loop). The new limit also applies to
+    event loops with submissions already in flight: new submissions wait
+    until fewer than n submissions are in flight.
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    n : int
+        Maximum number of submissions in flight.
+    """
+    global _max_concurrent_submissions
+    if not isinstance(n, int) or n < 1:
+        raise ValueError('n must be a positive int')
+    _max_concurrent_submissions = n
+
+
+class _DefaultSemaphore(object):
+    """Semaphore limiting submissions to the default maximum in flight
+
+    Unlike ``asyncio.Semaphore``, the limit isn't fixed when the semaphore is
+    created: ``_max_concurrent_submissions`` is checked every time a
+    submission starts, so changing it never lets more submissions than the
+    new limit run at the same time. Must be used in a single event loop.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self._waiters = []
+
+    async def __aenter__(self):
+        while self.in_flight >= _max_concurrent_submissions:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    async def __aexit__(self, *exc_info):
+        self.in_flight -= 1
+        # Waiters check the limit again, so all of them can be woken up
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+def _get_semaphore():
+    # Returns the default semaphore of the running event loop
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _DefaultSemaphore()
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _run_command_async(command, submit_files, submit_options=None,
+                             timeout=None):
+    # Asynchronous version of _run_command. The command is killed if it
+    # times out or the submission is cancelled.
+    assert_command_exists(command)
+    command = [command]
+    if submit_options is not None:
+        command.extend(split_command_string(submit_options))
+    command.extend(submit_files)
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE)
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        # Timed out or cancelled. Wait for the killed process, so its pipes
+        # are closed before the event loop is.
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        raise
+    return proc.returncode, decode_string(out), decode_string(err)
+
+
+async def _submit_file_async(command, submit, submit_file, submit_options,
+                             use_bindings, timeout, semaphore):
+    if semaphore is None:
+        semaphore = _get_semaphore()
+    async with semaphore:
+        if _use_bindings(use_bindings, submit_options):
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                None, functools.partial(submit, submit_file,
+                                        use_bindings=True))
+            return await asyncio.wait_for(future, timeout)
+        return _command_result(*await _run_command_async(
+            command, [submit_file], submit_options, timeout))
+
+
+async def submit_job_file_async(submit_file, submit_options=None,
+                                use_bindings=None, timeout=None,
+                                semaphore=None):
+    """Asynchronous version of ``submit_job_file``
+
+    Runs ``condor_submit`` as an asyncio subprocess, or submits through the
+    Python bindings in the event loop's default executor, so the event loop
+    isn't blocked while submitting.
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    submit_file : str
+        Path of the submit file.
+    submit_options : str, optional
+        Options to be passed to ``condor_submit``. Submitting with options
+        always uses the ``condor_submit`` command.
+    use_bindings : bool or None, optional
+        Whether to submit through the Python bindings (``True``) or the
+        ``condor_submit`` command (``False``). Default is ``None``, to use the
+        bindings when they are available.
+    timeout : float or None, optional
+        Maximum number of seconds to wait for the submission, after which
+        ``asyncio.TimeoutError`` is raised. Time spent waiting for the
+        semaphore doesn't count (default is ``None``, no timeout).
+    semaphore : asyncio.Semaphore, optional
+        Semaphore limiting the number of submissions in flight (default is a
+        semaphore shared by all submissions in the event loop, see
+        ``set_max_concurrent_submissions``).
+
+    Returns
+    -------
+    result : SubmitResult
+        Result of the submission.
+
+    Notes
+    -----
+    On timeout or cancellation, ``condor_submit`` is killed. Submissions
+    through the bindings can't be interrupted, so they may still complete
+    in the background.
+    """
+    return await _submit_file_async('condor_submit', submit_job_file,
+                                    submit_file, submit_options,
+                                    use_bindings, timeout, semaphore)
+
+
+async def submit_dag_file_async(submit_file, submit_options=None,
+                                use_bindings=None, timeout=None,
+                                semaphore=None):
+    """Asynchronous version of ``submit_dag_file``
+
+    See ``submit_job_file_async`` for details.
+
+    .. versionadded:: 0.7.0
+
+    Parameters
+    ----------
+    submit_file : str
+        Path of the DAG file.
+    submit_options : str, optional
+        Options to be passed to ``condor_submit_dag``. Submitting with
+        options always uses the ``condor_submit_dag`` command.
+    use_bindings : bool or None, optional
+        Whether to submit through the Python bindings (``True``) or the
+        ``condor_submit_dag`` command (``False``). Default is ``None``, to
+        use the bindings when they are available.
+    timeout : float or None, optional
+        Maximum number of seconds to wait for the submission (default is
+        ``None``, no timeout).
+    semaphore : asyncio.Semaphore, optional
+        Semaphore limiting the number of submissions in flight (default is a
+        semaphore shared by all submissions in the event loop).
+
+    Returns
+    -------
+    result : SubmitResult
+        Result of the submission.
+    """
+    return await _submit_file_async('condor_submit_dag', submit_dag_file,
+                                    submit_file, submit_options,
+                                    use_bindings, timeout, semaphore)
@@ -0,0 +1,102 @@
+import os
+import pytest
+from pycondor import Job, Dagman
+
+here = os.path.abspath(os.path.dirname(__file__))
+example_script = os.path.join(here, 'example_script.py')
+
+
+def _make_stages_dagman(submit_dir):
+    # Two stages of Jobs with arguments, the second stage being the parents
+    # of a subdag
+    dagman = Dagman('dagman', submit=submit_dir)
+    subdag = Dagman('subdag', submit=submit_dir, dag=dagman)
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                arguments=['--i {}'.format(i)], dag=dagman)
+            for i in range(20)]
+    subjobs = [Job('subjob_{}'.format(i), example_script, submit=submit_dir,
+                   dag=subdag)
+               for i in range(5)]
+    dagman.connect(jobs[:10], jobs[10:])
+    subdag.connect(subjobs[:2], subjobs[2:])
+    subdag.add_parents(jobs[10:])
+    return dagman
+
+
+def _make_pair_dagman(submit_dir, request_memory='2GB'):
+    # A Job and its child
+    dagman = Dagman('dagman', submit=submit_dir)
+    job_1 = Job('job_1', example_script, submit=submit_dir, dag=dagman)
+    job_2 = Job('job_2', example_script, submit=submit_dir, dag=dagman,
+                request_memory=request_memory)
+    job_2.add_parent(job_1)
+    return dagman
+
+
+def _make_chain_dagman(submit_dir, n_jobs=10):
+    # A chain of Jobs with two arguments each
+    dagman = Dagman('dagman', submit=submit_dir, extra_lines=['CONFIG x'])
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                arguments=['--a', '--b'], dag=dagman)
+            for i in range(n_jobs)]
+    for parent, child in zip(jobs[:-1], jobs[1:]):
+        child.add_parent(parent)
+    return dagman
+
+
+def _make_mixed_dagman(submit_dir):
+    # Jobs with various attributes and named arguments, and a spliced subdag
+    dagman = Dagman('dagman', submit=submit_dir, extra_lines=['CONFIG x'])
+    job_1 = Job('job_1', example_script, submit=submit_dir, log=submit_dir,
+                request_memory='2GB', dag=dagman)
+    job_1.add_arg('--a', name='a', retry=2)
+    job_1.add_arg('--b')
+    job_2 = Job('job_2', example_script, submit=submit_dir, queue=3,
+                dag=dagman)
+    subdag = Dagman('subdag', submit=submit_dir, dag=dagman, splice=True)
+    sub_job_1 = Job('sub_job_1', example_script, submit=submit_dir,
+                    dag=subdag)
+    sub_job_2 = Job('sub_job_2', example_script, submit=submit_dir,
+                    dag=subdag)
+    sub_job_2.add_parent(sub_job_1)
+    dagman.connect(job_1, [job_2, subdag])
+    return dagman
+
+
+# Graphs that the make_dagman fixture can create, by name
+_LAYOUTS = {
+    'stages': _make_stages_dagman,
+    'pair': _make_pair_dagman,
+    'chain': _make_chain_dagman,
+    'mixed': _make_mixed_dagman,
+}
+
+
+@pytest.fixture()
+def make_dagman(request):
+    """Returns a function creating a new Dagman in a submit directory
+
+    The graph is chosen by indirectly parametrizing the fixture with the
+    name of one of the layouts. Keyword arguments of the returned function
+    are passed on to the layout.
+    """
+    return _LAYOUTS[request.param]
+
+
+@pytest.fixture()
+def read_files():
+    """Returns a function reading all the files in a directory
+
+    The function returns a dict mapping the path of each file to its
+    contents.
+    """
+    def read(directory):
+        files = {}
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                with open(path, 'r') as f:
+                    files[path] = f.read()
+        return files
+
+    return read
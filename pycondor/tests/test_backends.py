@@ -0,0 +1,94 @@
+import os
+import pytest
+from pycondor import Job, FileBackend, MemoryBackend
+from pycondor.utils import clear_pycondor_environment_variables
+
+clear_pycondor_environment_variables()
+
+here = os.path.abspath(os.path.dirname(__file__))
+example_script = os.path.join(here, 'example_script.py')
+
+
+@pytest.mark.parametrize('make_dagman', ['mixed'], indirect=True)
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'shards': 2},
+    {'inline_submit': True},
+    {'share_submit_files': True},
+])
+def test_memory_backend_matches_file_backend(tmpdir, make_dagman, read_files,
+                                             kwargs):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    make_dagman(submit_dir).build(fancyname=False, backend=FileBackend(),
+                                  **kwargs)
+    expected = read_files(submit_dir)
+
+    memory_dir = str(tmpdir.join('memory'))
+    backend = MemoryBackend()
+    make_dagman(memory_dir).build(fancyname=False, backend=backend, **kwargs)
+
+    # Nothing is written to disk
+    assert not os.path.exists(memory_dir)
+    files = {path.replace(memory_dir, submit_dir): contents.replace(
+             memory_dir, submit_dir)
+             for path, contents in backend.files.items()}
+    assert files == expected
+
+
+@pytest.mark.parametrize('make_dagman', ['pair'], indirect=True)
+def test_memory_backend_fancyname(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    backend = MemoryBackend()
+    make_dagman(submit_dir).build(backend=backend)
+    make_dagman(submit_dir).build(backend=backend)
+
+    assert not os.path.exists(submit_dir)
+    names = sorted(os.path.basename(path) for path in backend.files)
+    assert len(names) == 6
+    for name in ['dagman', 'job_1', 'job_2']:
+        for number in ['01', '02']:
+            assert any(n.startswith(name) and n.endswith(
+                       '_{}.submit'.format(number)) for n in names)
+
+
+@pytest.mark.parametrize('make_dagman', ['pair'], indirect=True)
+def test_memory_backend_incremental(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    backend = MemoryBackend()
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, incremental=True, backend=backend)
+    assert dagman.build_stats['files_written'] == 3
+    assert os.path.join(submit_dir, '.pycondor_manifest.json') in \
+        backend.files
+
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, incremental=True, backend=backend)
+    assert dagman.build_stats['files_written'] == 0
+    assert dagman.build_stats['files_reused'] == 3
+    assert not os.path.exists(submit_dir)
+
+
+def test_memory_backend_job_build(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.add_arg('1')
+    job.add_arg('2')
+    backend = MemoryBackend()
+    job.build(fancyname=False, backend=backend)
+
+    assert not os.path.exists(submit_dir)
+    assert sorted(backend.files) == [os.path.join(submit_dir, 'job.args'),
+                                     os.path.join(submit_dir, 'job.submit')]
+    assert backend.files[job.submit_file].rstrip().endswith(
+        'queue ARGS from {}'.format(job.itemdata_file))
+
+
+def test_memory_backend_open_missing_file():
+    backend = MemoryBackend()
+    with pytest.raises(FileNotFoundError):
+        backend.open('missing.txt')
+    with backend.open('file.txt', 'w') as f:
+        f.write('contents')
+    with backend.open('file.txt') as f:
+        assert f.read() == 'contents'
+    assert backend.files == {os.path.abspath('file.txt'): 'contents'}
@@ -2,7 +2,8 @@
 import os
 import pytest
 
-from pycondor.basenode import BaseNode
+from pycondor.basenode import BaseNode, NodeList, _FancynameAllocator
+from pycondor.utils import logging_level_dict
 
 
 def test_BaseNode_extra_lines_raises():
@@ -49,3 +50,154 @@ def test_BaseNode_submit_environment_variable(tmpdir, monkeypatch):
     basenode = BaseNode('test_basenode')
 
     assert basenode.submit == tmp_submit_dir
+
+
+def test_BaseNode_add_parent_updates_both_nodes():
+    basenode = BaseNode('test_basenode')
+    parent_node = BaseNode('parent_basenode')
+    basenode.add_parent(parent_node)
+
+    assert basenode.parents == [parent_node]
+    assert parent_node.children == [basenode]
+
+
+def test_BaseNode_add_parent_ignores_duplicates():
+    basenode = BaseNode('test_basenode')
+    parent_node = BaseNode('parent_basenode')
+    basenode.add_parent(parent_node)
+    basenode.add_parent(parent_node)
+    parent_node.add_child(basenode)
+
+    assert basenode.parents == [parent_node]
+    assert parent_node.children == [basenode]
+
+
+def test_BaseNode_parents_insertion_order():
+    basenode = BaseNode('test_basenode')
+    parent_nodes = [BaseNode('parent_{}'.format(i)) for i in range(10)]
+    basenode.add_parents(parent_nodes[::-1])
+
+    assert basenode.parents == parent_nodes[::-1]
+    assert basenode.parents[0] is parent_nodes[-1]
+
+
+def test_NodeList():
+    nodes = [BaseNode('node_{}'.format(i)) for i in range(3)]
+    node_list = NodeList(nodes + nodes)
+
+    assert node_list == nodes
+    assert isinstance(node_list, list)
+    assert all(node in node_list for node in nodes)
+    assert 'node_0' not in node_list
+    assert [] not in node_list
+
+    node_list.remove(nodes[0])
+    assert nodes[0] not in node_list
+    node_list.append(nodes[0])
+    assert node_list == [nodes[1], nodes[2], nodes[0]]
+
+    del node_list[0]
+    assert nodes[1] not in node_list
+    assert node_list.pop() is nodes[0]
+    assert node_list == [nodes[2]]
+    assert node_list.copy() == node_list
+
+    node_list.clear()
+    assert not node_list
+    assert nodes[2] not in node_list
+
+
+def test_BaseNode_verbose_raises():
+    with pytest.raises(KeyError) as excinfo:
+        BaseNode('test_basenode', verbose=3)
+    assert 'Verbose option 3 for test_basenode not valid' in str(excinfo.value)
+
+
+@pytest.mark.parametrize('verbose', [0, 1, 2])
+def test_BaseNode_logger_level(verbose):
+    basenode = BaseNode('test_basenode_{}'.format(verbose), verbose=verbose)
+    assert basenode.logger.level == logging_level_dict[verbose]
+
+
+def test_FancynameAllocator(tmpdir):
+    submit_dir = str(tmpdir)
+    for filename in ['job_20200101_01.submit', 'job_20200101_03.submit',
+                     'job_20200101_03_noop.submit', 'job_20191231_07.submit',
+                     'other_job_20200101_05.submit', 'job_20200101_04.log']:
+        tmpdir.join(filename).write('')
+
+    allocator = _FancynameAllocator(date='20200101')
+    assert allocator.get_name(submit_dir, 'job') == 'job_20200101_04'
+    assert allocator.get_name(submit_dir, 'job') == 'job_20200101_05'
+    assert allocator.get_name(submit_dir, 'other_job') == \
+        'other_job_20200101_06'
+    assert allocator.get_name(submit_dir, 'new_job') == 'new_job_20200101_01'
+
+
+def test_FancynameAllocator_over_99(tmpdir):
+    submit_dir = str(tmpdir)
+    for i in range(1, 101):
+        tmpdir.join('job_20200101_{:02d}.submit'.format(i)).write('')
+
+    allocator = _FancynameAllocator(date='20200101')
+    assert allocator.get_name(submit_dir, 'job') == 'job_20200101_101'
+
+
+def test_FancynameAllocator_scans_once(tmpdir, monkeypatch):
+    submit_dir = str(tmpdir)
+    listdir = os.listdir
+    listed = []
+
+    def counting_listdir(path):
+        listed.append(path)
+        return listdir(path)
+
+    monkeypatch.setattr(os, 'listdir', counting_listdir)
+    allocator = _FancynameAllocator()
+    names = {allocator.get_name(submit_dir, 'job') for _ in range(100)}
+    assert len(names) == 100
+    assert listed == [submit_dir]
+
+
+def test_FancynameAllocator_reserves_names(tmpdir):
+    # Simulates two builds that list the submit directory at the same time
+    submit_dir = str(tmpdir)
+    allocator_1 = _FancynameAllocator(date='20200101')
+    allocator_2 = _FancynameAllocator(date='20200101')
+    allocator_1._highest[submit_dir] = allocator_1._scan(submit_dir)
+    allocator_2._highest[submit_dir] = allocator_2._scan(submit_dir)
+
+    names_1 = [allocator_1.get_name(submit_dir, 'job') for _ in range(3)]
+    names_2 = [allocator_2.get_name(submit_dir, 'job') for _ in range(3)]
+    assert names_1 == ['job_20200101_01', 'job_20200101_02',
+                       'job_20200101_03']
+    assert names_2 == ['job_20200101_04', 'job_20200101_05',
+                       'job_20200101_06']
+    assert sorted(os.listdir(submit_dir)) == sorted(
+        '{}.submit'.format(name) for name in names_1 + names_2)
+
+
+def test_FancynameAllocator_get_names(tmpdir):
+    submit_dir = str(tmpdir)
+    # Another build reserved job_20200101_02 after this one listed the
+    # submit directory
+    allocator = _FancynameAllocator(date='20200101')
+    allocator._highest[submit_dir] = allocator._scan(submit_dir)
+    tmpdir.join('job_20200101_02.submit').write('')
+
+    created = []
+
+    def recording_map(func, items):
+        created.extend(items)
+        return [func(item) for item in items]
+
+    names = allocator.get_names([(submit_dir, 'job'), (submit_dir, 'job'),
+                                 (submit_dir, 'other_job'),
+                                 (submit_dir, 'job')], recording_map)
+    assert names == ['job_20200101_01', 'job_20200101_04',
+                     'other_job_20200101_01', 'job_20200101_03']
+    # All first attempts are created in a single map call
+    assert len(created) == 4
+    assert sorted(os.listdir(submit_dir)) == sorted(
+        ['job_20200101_02.submit'] +
+        ['{}.submit'.format(name) for name in names])
@@ -3,7 +3,8 @@ import os
 from collections import Counter
 import filecmp
 import pytest
-from pycondor import Job, Dagman
+from pycondor import Job, Dagman, basenode
+from pycondor import dagman as dagman_module
 from pycondor.dagman import _iter_job_args, _get_subdag_string
 from pycondor.utils import clear_pycondor_environment_variables
 
@@ -195,7 +196,7 @@ def test_repr():
 def test_get_job_arg_lines_non_job_raises():
     not_job = 'not a job'
     with pytest.raises(TypeError) as excinfo:
-        Dagman('dag_name')._get_job_arg_lines(not_job, fancyname=True)
+        Dagman('dag_name')._get_job_arg_lines(not_job)
     error = 'Expecting a Job object, got {}'.format(type(not_job))
     assert error == str(excinfo.value)
 
@@ -203,7 +204,7 @@ def test_get_job_arg_lines_non_job_raises():
 def test_get_job_arg_lines_not_built_raises():
     job = Job('testjob', example_script)
     with pytest.raises(ValueError) as excinfo:
-        Dagman('dag_name')._get_job_arg_lines(job, fancyname=True)
+        Dagman('dag_name')._get_job_arg_lines(job)
     error = ('Job {} must be built before adding it to a '
              'Dagman'.format(job.name))
     assert error == str(excinfo.value)
@@ -294,3 +295,705 @@ def test_dagman_add_node_ignores_duplicates(tmpdir, dagman):
     dagman.add_job(job)
 
     assert dagman.nodes == [job]
+
+
+def test_dagman_getitem(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    job = Job('job', example_script, submit=submit_dir, dag=dagman)
+    subdag = Dagman('subdag', submit=submit_dir, dag=dagman)
+
+    assert dagman['job'] is job
+    assert dagman['subdag'] is subdag
+    with pytest.raises(KeyError) as excinfo:
+        dagman['not_a_node']
+    error = 'Dagman {} has no node named not_a_node'.format(dagman.name)
+    assert error in str(excinfo.value)
+
+
+def test_dagman_getitem_nodes_appended(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    Job('job_1', example_script, submit=submit_dir, dag=dagman)
+    job_2 = Job('job_2', example_script, submit=submit_dir)
+    dagman.nodes.append(job_2)
+    assert dagman['job_2'] is job_2
+
+    dagman.nodes.remove(job_2)
+    with pytest.raises(KeyError) as excinfo:
+        dagman['job_2']
+    assert excinfo.value.__cause__ is None
+    assert excinfo.value.__suppress_context__
+
+
+def test_dagman_add_node_duplicate_name_raises(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    with pytest.raises(ValueError) as excinfo:
+        Job('job', example_script, submit=submit_dir, dag=dagman)
+    error = ('Dagman {} already has a node named job. Node names must be '
+             'unique within a Dagman.'.format(dagman.name))
+    assert error == str(excinfo.value)
+    assert len(dagman) == 1
+
+
+def test_dagman_add_edges(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                dag=dagman) for i in range(3)]
+    edges = [(jobs[0], jobs[1]), (jobs[1], jobs[2]), (jobs[0], jobs[2]),
+             (jobs[0], jobs[1])]
+    dagman.add_edges(edges)
+
+    assert jobs[0].children == [jobs[1], jobs[2]]
+    assert jobs[1].parents == [jobs[0]]
+    assert jobs[1].children == [jobs[2]]
+    assert jobs[2].parents == [jobs[1], jobs[0]]
+
+
+def test_dagman_add_edges_raises(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    job = Job('job', example_script, submit=submit_dir, dag=dagman)
+    other_job = Job('other_job', example_script, submit=submit_dir)
+
+    with pytest.raises(TypeError) as excinfo:
+        dagman.add_edges([(job, 'not_a_node')])
+    error = ('add_edges() is expecting Job or Dagman instances. Got an '
+             'object of type {}'.format(type('not_a_node')))
+    assert error == str(excinfo.value)
+
+    with pytest.raises(TypeError):
+        dagman.add_edges([job])
+
+    with pytest.raises(ValueError) as excinfo:
+        dagman.add_edges([(job, other_job)])
+    error = 'other_job is not a node in Dagman {}'.format(dagman.name)
+    assert error == str(excinfo.value)
+
+    with pytest.raises(ValueError) as excinfo:
+        dagman.add_edges([(job, job)])
+    assert 'Cannot add job as a parent of itself' == str(excinfo.value)
+
+    # No edges are added if any edge is invalid
+    assert not job.haschildren()
+    assert not job.hasparents()
+
+
+def test_dagman_connect(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    parents = [Job('parent_{}'.format(i), example_script, submit=submit_dir,
+                   dag=dagman) for i in range(3)]
+    children = [Job('child_{}'.format(i), example_script, submit=submit_dir,
+                    dag=dagman) for i in range(2)]
+    merge = Job('merge', example_script, submit=submit_dir, dag=dagman)
+    children[0].add_parent(parents[1])
+    dagman.connect(parents, children)
+    dagman.connect(children, merge)
+
+    assert children[0].parents == [parents[1], parents[0], parents[2]]
+    assert children[1].parents == parents
+    assert merge.parents == children
+    for parent in parents:
+        assert parent.children == children
+
+    with pytest.raises(ValueError):
+        dagman.connect(parents, parents[0])
+
+
+def test_dagman_validate_order(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    child = Job('child', example_script, submit=submit_dir, dag=dagman)
+    parent = Job('parent', example_script, submit=submit_dir, dag=dagman)
+    other = Job('other', example_script, submit=submit_dir, dag=dagman)
+    grandparent = Job('grandparent', example_script, submit=submit_dir,
+                      dag=dagman)
+    dagman.add_edges([(parent, child), (grandparent, parent)])
+
+    assert dagman.validate() == [grandparent, parent, child, other]
+
+
+def test_dagman_validate_keeps_insertion_order(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                dag=dagman) for i in range(5)]
+    jobs[4].add_parents(jobs[:2])
+    jobs[3].add_parent(jobs[2])
+
+    assert dagman.validate() == jobs
+
+
+def test_dagman_validate_cycle_raises(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                dag=dagman) for i in range(4)]
+    dagman.add_edges([(jobs[0], jobs[1]), (jobs[1], jobs[2]),
+                      (jobs[2], jobs[3]), (jobs[3], jobs[1])])
+
+    with pytest.raises(ValueError) as excinfo:
+        dagman.validate()
+    error = ('Dagman {} contains a cycle: job_1 -> job_2 -> job_3 -> '
+             'job_1'.format(dagman.name))
+    assert error == str(excinfo.value)
+
+    # Cycles are caught before any files are written
+    with pytest.raises(ValueError):
+        dagman.build()
+    assert not os.listdir(dagman.submit)
+
+
+def test_dagman_validate_subdag_cycle_raises(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    subdag = Dagman('subdag', submit=submit_dir, dag=dagman)
+    job_1 = Job('job_1', example_script, submit=submit_dir, dag=subdag)
+    job_2 = Job('job_2', example_script, submit=submit_dir, dag=subdag)
+    job_1.add_parent(job_2)
+    job_2.add_parent(job_1)
+
+    with pytest.raises(ValueError) as excinfo:
+        dagman.validate()
+    assert 'Dagman subdag contains a cycle' in str(excinfo.value)
+
+
+def test_dagman_validate_parent_not_in_dag_raises(tmpdir, dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    job = Job('job', example_script, submit=submit_dir, dag=dagman)
+    other_job = Job('other_job', example_script, submit=submit_dir)
+    job.add_parent(other_job)
+
+    with pytest.raises(ValueError) as excinfo:
+        dagman.validate()
+    error = ('other_job is a parent of job, but is not a node in Dagman '
+             '{}'.format(dagman.name))
+    assert error == str(excinfo.value)
+
+
+def test_dagman_validate_deep_graph(tmpdir, dagman):
+    # Validation shouldn't be limited by the recursion limit
+    submit_dir = str(tmpdir.join('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                dag=dagman) for i in range(5000)]
+    dagman.add_edges(zip(jobs[1:], jobs[:-1]))
+
+    assert dagman.validate() == jobs[::-1]
+
+
+def get_dependency_lines(dagman):
+    with open(dagman.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    return lines[lines.index('#Inter-job dependencies') + 1:]
+
+
+@pytest.mark.parametrize('reduce_edges', [True, False])
+def test_dagman_build_reduce_edges(tmpdir, reduce_edges):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    a, b, c, d = [Job(name, example_script, submit=submit_dir, dag=dagman)
+                  for name in 'abcd']
+    dagman.add_edges([(a, b), (b, c), (a, c), (c, d), (a, d), (b, d)])
+    dagman.build(fancyname=False, reduce_edges=reduce_edges)
+
+    lines = get_dependency_lines(dagman)
+    if reduce_edges:
+        assert lines == ['Parent a Child b', 'Parent b Child c',
+                         'Parent c Child d']
+        assert dagman.build_stats['edges_removed'] == 3
+    else:
+        assert lines == ['Parent a Child b', 'Parent b a Child c',
+                         'Parent c a b Child d']
+        assert 'edges_removed' not in dagman.build_stats
+    # The graph itself isn't modified
+    assert d.parents == [c, a, b]
+
+
+def test_dagman_build_reduce_edges_diamond(tmpdir):
+    # No edges are redundant in a diamond
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    a, b, c, d = [Job(name, example_script, submit=submit_dir, dag=dagman)
+                  for name in 'abcd']
+    dagman.connect(a, [b, c])
+    dagman.connect([b, c], d)
+    dagman.build(fancyname=False, reduce_edges=True)
+
+    assert get_dependency_lines(dagman) == ['Parent a Child b',
+                                            'Parent a Child c',
+                                            'Parent b c Child d']
+    assert dagman.build_stats['edges_removed'] == 0
+
+
+def test_dagman_build_join_nodes(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    parents = [Job('parent_{}'.format(i), example_script, submit=submit_dir,
+                   dag=dagman) for i in range(3)]
+    children = [Job('child_{}'.format(i), example_script, submit=submit_dir,
+                    dag=dagman) for i in range(3)]
+    merge = Job('merge', example_script, submit=submit_dir, dag=dagman)
+    dagman.connect(parents, children)
+    dagman.connect(children, merge)
+    dagman.build(fancyname=False, join_nodes=True)
+
+    with open(dagman.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    noop_submit_file = os.path.join(submit_dir, 'dagman_noop.submit')
+    assert 'JOB dagman_join_0 {} NOOP'.format(noop_submit_file) in lines
+    assert os.path.exists(noop_submit_file)
+    assert get_dependency_lines(dagman) == [
+        'Parent parent_0 parent_1 parent_2 Child dagman_join_0',
+        'Parent dagman_join_0 Child child_0 child_1 child_2',
+        'Parent child_0 child_1 child_2 Child merge',
+    ]
+    assert dagman.build_stats['join_nodes'] == 1
+    assert dagman.build_stats['join_edges_saved'] == 3
+
+
+def test_dagman_build_join_nodes_job_args(tmpdir):
+    # Job arguments are separate DAG nodes, so a single parent Job with many
+    # arguments and a child Job with many arguments also get a join node
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    parent = Job('parent', example_script, submit=submit_dir, dag=dagman,
+                 arguments=['a', 'b'])
+    child = Job('child', example_script, submit=submit_dir, dag=dagman,
+                arguments=['c', 'd', 'e'])
+    child.add_parent(parent)
+    dagman.build(fancyname=False, join_nodes=True)
+
+    assert get_dependency_lines(dagman) == [
+        'Parent parent_arg_0 parent_arg_1 Child dagman_join_0',
+        'Parent dagman_join_0 Child child_arg_0 child_arg_1 child_arg_2',
+    ]
+
+
+def test_dagman_build_join_nodes_name_clash(tmpdir):
+    # The node name of an argument of Job dagman_join must not be reused
+    # for a join node
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    parents = [Job('parent_{}'.format(i), example_script, submit=submit_dir,
+                   dag=dagman) for i in range(3)]
+    children = [Job('child_{}'.format(i), example_script, submit=submit_dir,
+                    dag=dagman) for i in range(3)]
+    dagman.connect(parents, children)
+    clash = Job('dagman_join', example_script, submit=submit_dir,
+                dag=dagman)
+    clash.add_arg('--a', name='0')
+    clash.add_arg('--b', name='1')
+    dagman.build(fancyname=False, join_nodes=True)
+
+    assert get_dependency_lines(dagman) == [
+        'Parent parent_0 parent_1 parent_2 Child dagman_join_0_',
+        'Parent dagman_join_0_ Child child_0 child_1 child_2',
+    ]
+
+
+def test_dagman_build_join_nodes_not_needed(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    parents = [Job('parent_{}'.format(i), example_script, submit=submit_dir,
+                   dag=dagman) for i in range(2)]
+    children = [Job('child_{}'.format(i), example_script, submit=submit_dir,
+                    dag=dagman) for i in range(2)]
+    dagman.connect(parents, children)
+    dagman.build(fancyname=False, join_nodes=True)
+
+    assert get_dependency_lines(dagman) == [
+        'Parent parent_0 parent_1 Child child_0',
+        'Parent parent_0 parent_1 Child child_1',
+    ]
+    assert dagman.build_stats['join_nodes'] == 0
+    assert not os.path.exists(os.path.join(submit_dir, 'dagman_noop.submit'))
+
+
+def test_dagman_build_group_children(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    a, b, c, d, e = [Job(name, example_script, submit=submit_dir, dag=dagman)
+                     for name in 'abcde']
+    dagman.connect([a, b], [c, e])
+    d.add_parents([b, a])
+    e.add_parent(c)
+    dagman.build(fancyname=False, group_children=True)
+
+    assert get_dependency_lines(dagman) == ['Parent a b Child c d',
+                                            'Parent a b c Child e']
+    assert dagman.build_stats['dependency_lines'] == 2
+
+
+def test_dagman_build_group_children_join_nodes(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    parents = [Job('parent_{}'.format(i), example_script, submit=submit_dir,
+                   dag=dagman) for i in range(3)]
+    children = [Job('child_{}'.format(i), example_script, submit=submit_dir,
+                    dag=dagman) for i in range(3)]
+    merge = Job('merge', example_script, submit=submit_dir, dag=dagman)
+    dagman.connect(parents, children)
+    dagman.connect(parents[:2], merge)
+    dagman.build(fancyname=False, join_nodes=True, group_children=True)
+
+    assert get_dependency_lines(dagman) == [
+        'Parent parent_0 parent_1 parent_2 Child dagman_join_0',
+        'Parent dagman_join_0 Child child_0 child_1 child_2',
+        'Parent parent_0 parent_1 Child merge',
+    ]
+
+
+@pytest.mark.parametrize('make_dagman', ['stages'], indirect=True)
+def test_dagman_build_workers(tmpdir, make_dagman, read_files):
+    serial_dir = str(tmpdir.join('serial'))
+    parallel_dir = str(tmpdir.join('parallel'))
+    make_dagman(serial_dir).build(fancyname=False)
+    make_dagman(parallel_dir).build(fancyname=False, workers=4)
+
+    serial = {os.path.basename(path): contents.replace(serial_dir, '')
+              for path, contents in read_files(serial_dir).items()}
+    parallel = {os.path.basename(path): contents.replace(parallel_dir, '')
+                for path, contents in read_files(parallel_dir).items()}
+    assert serial == parallel
+
+
+def test_dagman_build_workers_fancyname(tmpdir):
+    # Jobs with the same name in the same submit directory must still get
+    # distinct fancynames when their submit files are written concurrently
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    subdag = Dagman('subdag', submit=submit_dir, dag=dagman)
+    job_1 = Job('job', example_script, submit=submit_dir, dag=dagman)
+    job_2 = Job('job', example_script, submit=submit_dir, dag=subdag)
+    dagman.build(workers=2)
+
+    assert job_1.submit_name != job_2.submit_name
+    assert os.path.exists(job_1.submit_file)
+    assert os.path.exists(job_2.submit_file)
+
+
+@pytest.mark.parametrize('workers', [0, -1, 1.5])
+def test_dagman_build_workers_raises(tmpdir, workers):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    with pytest.raises(ValueError) as excinfo:
+        dagman.build(workers=workers)
+    assert 'workers must be a positive int' in str(excinfo.value)
+
+
+@pytest.mark.parametrize('make_dagman', ['pair'], indirect=True)
+def test_dagman_build_incremental(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, incremental=True)
+    assert dagman.build_stats['files_written'] == 3
+    assert dagman.build_stats['files_reused'] == 0
+    assert os.path.exists(os.path.join(submit_dir, '.pycondor_manifest.json'))
+    mtimes = {f: os.stat(os.path.join(submit_dir, f)).st_mtime_ns
+              for f in os.listdir(submit_dir)}
+
+    # Nothing changed, so no files should be touched
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, incremental=True)
+    assert dagman.build_stats['files_written'] == 0
+    assert dagman.build_stats['files_reused'] == 3
+    assert mtimes == {f: os.stat(os.path.join(submit_dir, f)).st_mtime_ns
+                      for f in os.listdir(submit_dir)}
+
+    # Only the submit file for the changed Job should be rewritten
+    dagman = make_dagman(submit_dir, request_memory='4GB')
+    dagman.build(fancyname=False, incremental=True)
+    assert dagman.build_stats['files_written'] == 1
+    assert dagman.build_stats['files_reused'] == 2
+    with open(dagman['job_2'].submit_file, 'r') as f:
+        assert 'request_memory = 4GB' in f.read()
+
+
+@pytest.mark.parametrize('make_dagman', ['pair'], indirect=True)
+def test_dagman_build_incremental_fancyname_raises(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir)
+    with pytest.raises(ValueError) as excinfo:
+        dagman.build(incremental=True)
+    assert 'fancyname=False' in str(excinfo.value)
+    assert not os.path.exists(submit_dir)
+
+
+@pytest.mark.parametrize('make_dagman', ['pair'], indirect=True)
+def test_dagman_build_incremental_modified_file(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, incremental=True)
+    with open(dagman['job_1'].submit_file, 'r') as f:
+        contents = f.read()
+    with open(dagman['job_1'].submit_file, 'w') as f:
+        f.write('edited')
+
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, incremental=True)
+    assert dagman.build_stats['files_written'] == 1
+    with open(dagman['job_1'].submit_file, 'r') as f:
+        assert f.read() == contents
+
+
+@pytest.mark.parametrize('make_dagman', ['pair'], indirect=True)
+def test_dagman_build_not_incremental(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    for _ in range(2):
+        dagman = make_dagman(submit_dir)
+        dagman.build(fancyname=False)
+        assert dagman.build_stats['files_written'] == 3
+        assert dagman.build_stats['files_reused'] == 0
+    assert not os.path.exists(os.path.join(submit_dir,
+                                           '.pycondor_manifest.json'))
+
+
+def test_dagman_build_checks_dirs_once(tmpdir, monkeypatch):
+    submit_dir = str(tmpdir.join('submit'))
+    log_dir = str(tmpdir.join('log'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    for i in range(10):
+        Job('job_{}'.format(i), example_script, submit=submit_dir,
+            log=log_dir, dag=dagman)
+
+    checked = []
+    isdir = os.path.isdir
+
+    def counting_isdir(path):
+        checked.append(path)
+        return isdir(path)
+
+    monkeypatch.setattr(os.path, 'isdir', counting_isdir)
+    dagman.build(fancyname=False)
+
+    assert sorted(checked) == sorted([log_dir, submit_dir])
+    # Each Job checks the submit and log directories, and the directories
+    # of its submit and log files
+    assert dagman.build_stats['dir_checks_saved'] == 10 * 4 + 1 - 2
+
+
+def test_dagman_build_share_submit_files(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    log_dir = str(tmpdir.join('log'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    job_1 = Job('job_1', example_script, submit=submit_dir, log=log_dir,
+                dag=dagman)
+    job_2 = Job('job_2', example_script, submit=submit_dir, log=log_dir,
+                dag=dagman)
+    job_3 = Job('job_3', example_script, submit=submit_dir, log=log_dir,
+                arguments=['--a', '--b'], dag=dagman)
+    job_4 = Job('job_4', example_script, submit=submit_dir, log=log_dir,
+                arguments=['--c'], dag=dagman)
+    job_5 = Job('job_5', example_script, submit=submit_dir, log=log_dir,
+                request_memory='2GB', dag=dagman)
+    job_2.add_parent(job_1)
+    dagman.build(fancyname=False, share_submit_files=True)
+
+    assert job_2.submit_file == job_1.submit_file
+    assert job_4.submit_file == job_3.submit_file
+    assert len({job_1.submit_file, job_3.submit_file,
+                job_5.submit_file}) == 3
+    assert dagman.build_stats['submit_files_shared'] == 2
+    assert sorted(os.listdir(submit_dir)) == ['dagman.submit',
+                                              'job_1.submit', 'job_3.submit',
+                                              'job_5.submit']
+    with open(job_1.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    assert 'log = {}'.format(os.path.join(log_dir, '$(job_name).log')) in lines
+    assert 'job_name = $(job_name)' in lines
+
+    with open(dagman.submit_file, 'r') as f:
+        dag_lines = f.read().split('\n')
+    assert 'JOB job_2 {}'.format(job_1.submit_file) in dag_lines
+    assert 'VARS job_2 job_name="job_2"' in dag_lines
+    assert 'JOB job_4_arg_0 {}'.format(job_3.submit_file) in dag_lines
+    assert 'VARS job_4_arg_0 job_name="job_4"' in dag_lines
+    assert 'VARS job_3_arg_1 job_name="job_3"' in dag_lines
+
+
+def test_dagman_build_share_submit_files_workers(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir,
+                request_memory='{}GB'.format(i % 3), dag=dagman)
+            for i in range(30)]
+    dagman.build(fancyname=False, share_submit_files=True, workers=4)
+
+    assert dagman.build_stats['submit_files_shared'] == 27
+    for job in jobs:
+        assert job.submit_file == jobs[int(job.name[4:]) % 3].submit_file
+
+
+def test_dagman_build_inline_submit(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    job_1 = Job('job_1', example_script, submit=submit_dir, dag=dagman)
+    job_2 = Job('job_2', example_script, submit=submit_dir,
+                arguments=['--a', '--b'], dag=dagman)
+    job_2.add_parent(job_1)
+    dagman.build(fancyname=False, inline_submit=True)
+
+    assert os.listdir(submit_dir) == ['dagman.submit']
+    assert dagman.build_stats['submit_descriptions'] == 2
+    with open(dagman.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    assert lines == [
+        'SUBMIT-DESCRIPTION job_1 {',
+        'executable = {}'.format(example_script),
+        'queue',
+        '}',
+        'SUBMIT-DESCRIPTION job_2 {',
+        'executable = {}'.format(example_script),
+        'arguments = $(ARGS)',
+        'queue',
+        '}',
+        'JOB job_1 job_1',
+        'JOB job_2_arg_0 job_2',
+        'VARS job_2_arg_0 ARGS="--a"',
+        'JOB job_2_arg_1 job_2',
+        'VARS job_2_arg_1 ARGS="--b"',
+        '',
+        '#Inter-job dependencies',
+        'Parent job_1 Child job_2_arg_0 job_2_arg_1',
+    ]
+
+
+def test_dagman_build_inline_submit_shared(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    for i in range(5):
+        Job('job_{}'.format(i), example_script, submit=submit_dir,
+            dag=dagman)
+    dagman.build(fancyname=False, inline_submit=True,
+                 share_submit_files=True, workers=2)
+
+    assert os.listdir(submit_dir) == ['dagman.submit']
+    assert dagman.build_stats['submit_descriptions'] == 1
+    assert dagman.build_stats['submit_files_shared'] == 4
+    with open(dagman.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    assert lines.count('SUBMIT-DESCRIPTION job_0 {') == 1
+    for i in range(5):
+        assert 'JOB job_{} job_0'.format(i) in lines
+        assert 'VARS job_{0} job_name="job_{0}"'.format(i) in lines
+
+
+def test_dagman_build_splice(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    first = Job('first', example_script, submit=submit_dir, dag=dagman)
+    spliced = Dagman('spliced', submit=submit_dir, dag=dagman, splice=True)
+    subdag = Dagman('subdag', submit=submit_dir, dag=dagman)
+    last = Job('last', example_script, submit=submit_dir, dag=dagman)
+    Job('spliced_job', example_script, submit=submit_dir, dag=spliced)
+    Job('subdag_job', example_script, submit=submit_dir, dag=subdag)
+    spliced.add_parent(first)
+    last.add_parents([spliced, subdag])
+    dagman.build(fancyname=False)
+
+    with open(dagman.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    assert 'SPLICE spliced {}'.format(spliced.submit_file) in lines
+    assert 'SUBDAG EXTERNAL subdag {}'.format(subdag.submit_file) in lines
+    assert get_dependency_lines(dagman) == ['Parent first Child spliced',
+                                            'Parent spliced subdag Child last']
+
+
+def read_dag_lines(dag_file):
+    # Reads the lines of dag_file, expanding INCLUDE lines
+    with open(dag_file, 'r') as f:
+        lines = f.read().split('\n')
+    expanded = []
+    for line in lines:
+        if line.startswith('INCLUDE '):
+            expanded.extend(read_dag_lines(line[len('INCLUDE '):]))
+        else:
+            expanded.append(line)
+    return expanded
+
+
+@pytest.mark.parametrize('make_dagman', ['chain'], indirect=True)
+def test_dagman_build_shards(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False)
+    expected = read_dag_lines(dagman.submit_file)
+
+    dagman = make_dagman(submit_dir)
+    dagman.build(fancyname=False, shards=3)
+    assert dagman.build_stats['shard_files'] == 6
+    with open(dagman.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    assert lines == (
+        ['INCLUDE {}'.format(os.path.join(submit_dir,
+                                          'dagman_nodes_{}.dag'.format(i)))
+         for i in range(3)]
+        + ['CONFIG x', '', '#Inter-job dependencies']
+        + ['INCLUDE {}'.format(
+            os.path.join(submit_dir, 'dagman_dependencies_{}.dag'.format(i)))
+           for i in range(3)]
+    )
+    assert read_dag_lines(dagman.submit_file) == expected
+
+
+@pytest.mark.parametrize('make_dagman', ['chain'], indirect=True)
+def test_dagman_build_shards_incremental(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    make_dagman(submit_dir).build(fancyname=False, shards=5,
+                                  incremental=True)
+    dagman = make_dagman(submit_dir)
+    dagman['job_0'].add_arg('--c')
+    dagman.build(fancyname=False, shards=5, incremental=True)
+
+    # Only the first node shard and the first dependency shard change
+    assert dagman.build_stats['files_written'] == 2
+    assert dagman.build_stats['files_reused'] == 10 + 1 + 8
+
+
+@pytest.mark.parametrize('make_dagman', ['chain'], indirect=True)
+def test_dagman_build_shards_more_than_nodes(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir, n_jobs=2)
+    dagman.build(fancyname=False, shards=10)
+    assert dagman.build_stats['shard_files'] == 3
+
+
+@pytest.mark.parametrize('make_dagman', ['chain'], indirect=True)
+def test_dagman_build_shards_max_workers(tmpdir, monkeypatch,
+                                         make_dagman):
+    pool_sizes = []
+    thread_pool = basenode.ThreadPoolExecutor
+
+    def recording_pool(max_workers):
+        pool_sizes.append(max_workers)
+        return thread_pool(max_workers=max_workers)
+
+    monkeypatch.setattr(basenode, 'ThreadPoolExecutor', recording_pool)
+    monkeypatch.setattr(dagman_module, '_MAX_SHARD_WORKERS', 4)
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir, n_jobs=100)
+    dagman.build(fancyname=False, shards=50)
+    assert pool_sizes == [4]
+
+
+@pytest.mark.parametrize('make_dagman', ['chain'], indirect=True)
+@pytest.mark.parametrize('shards', [0, -2, 2.5])
+def test_dagman_build_shards_raises(tmpdir, make_dagman, shards):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = make_dagman(submit_dir)
+    with pytest.raises(ValueError) as excinfo:
+        dagman.build(shards=shards)
+    assert 'shards must be a positive int' in str(excinfo.value)
+
+
+def test_dagman_build_share_submit_files_fancyname_warning(tmpdir, caplog):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    dagman.build(share_submit_files=True)
+    assert 'Every Job still reserves its name' in caplog.text
+
+
+def test_dagman_build_inline_submit_fancyname_raises(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    with pytest.raises(ValueError) as excinfo:
+        dagman.build(inline_submit=True)
+    assert 'use fancyname=False' in str(excinfo.value)
+    assert not os.path.exists(submit_dir)
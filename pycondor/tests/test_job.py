@@ -5,6 +5,7 @@ import shutil
 import warnings
 import pytest
 from pycondor import Job, Dagman
+from pycondor.job import JobArg
 from pycondor.utils import clear_pycondor_environment_variables
 warnings.simplefilter('always')
 
@@ -243,18 +244,40 @@ def test_job_subdag_build(tmpdir):
         assert set(extra_lines) <= set(line.rstrip('\n') for line in f)
 
 
-def test_job_args_and_queue_raises(tmpdir):
+@pytest.mark.parametrize('queue', [None, 2])
+def test_job_args_itemdata(tmpdir, queue):
     submit_dir = str(tmpdir.join('submit'))
+    job = Job('job', example_script, submit=submit_dir, queue=queue)
+    job.add_args('--input file_{}.hdf'.format(i) for i in range(10))
+    job.build(fancyname=False)
 
-    with pytest.raises(NotImplementedError) as excinfo:
-        job = Job('job', example_script,
-                  submit=submit_dir,
-                  queue=2)
-        job.add_args(str(i) for i in range(10))
-        job.build()
-    error = ('At this time multiple arguments and queue values '
-             'are only supported through Dagman')
-    assert error == str(excinfo.value)
+    with open(job.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    itemdata_file = os.path.join(submit_dir, 'job.args')
+    queue_line = 'queue {}ARGS from {}'.format(
+        '{} '.format(queue) if queue else '', itemdata_file)
+    assert lines[-2:] == ['arguments = $(ARGS)', queue_line]
+    assert job.itemdata_file == itemdata_file
+    with open(itemdata_file, 'r') as f:
+        assert f.read() == ''.join('--input file_{}.hdf\n'.format(i)
+                                   for i in range(10))
+
+
+def test_job_args_itemdata_arg_names(tmpdir):
+    submit_dir = str(tmpdir.join('submit'))
+    log_dir = str(tmpdir.join('log'))
+    job = Job('job', example_script, submit=submit_dir, log=log_dir)
+    job.add_arg('--a 1', name='first')
+    job.add_arg('--b 2')
+    job.build(fancyname=False)
+
+    with open(job.submit_file, 'r') as f:
+        lines = f.read().split('\n')
+    assert 'log = {}'.format(os.path.join(log_dir, '$(job_name).log')) in lines
+    assert lines[-1] == 'queue job_name,ARGS from {}'.format(
+        job.itemdata_file)
+    with open(job.itemdata_file, 'r') as f:
+        assert f.read() == 'job_first, --a 1\njob, --b 2\n'
 
 
 def test_job_args_warning(caplog, job):
@@ -313,3 +336,43 @@ def test_init_retry_type_fail():
         job_with_retry.build()
     error = 'retry must be an int'
     assert error == str(excinfo.value)
+
+
+def test_get_expanded_node_names_cached(job):
+    job.add_arg('argument1', name='arg1')
+    job.add_arg('argument2')
+    job.build(fancyname=False)
+
+    node_names = job._get_expanded_node_names()
+    assert node_names == ['jobname_arg1', 'jobname_arg_1']
+    assert job._get_expanded_node_names() is node_names
+
+    # Adding an argument invalidates the cached names
+    job.add_arg('argument3')
+    assert job._get_expanded_node_names() == [
+        'jobname_arg1', 'jobname_arg_1', 'jobname_arg_2']
+
+    # As does a new submit name
+    job.submit_name = 'newname'
+    assert job._get_expanded_node_names() == [
+        'newname_arg1', 'newname_arg_1', 'newname_arg_2']
+
+
+def test_get_expanded_node_names_args_replaced(job):
+    job.add_arg('argument1', name='arg1')
+    job.add_arg('argument2')
+    job.build(fancyname=False)
+    assert job._get_expanded_node_names() == ['jobname_arg1',
+                                              'jobname_arg_1']
+
+    # Replacing the arguments with as many new ones invalidates the cache
+    job.args = [JobArg('argument3', None, None),
+                JobArg('argument4', 'a4', None)]
+    assert job._get_expanded_node_names() == ['jobname_arg_0', 'jobname_a4']
+
+    # As does editing them in place
+    job.args[0] = JobArg('argument5', 'a5', None)
+    assert job._get_expanded_node_names() == ['jobname_a5', 'jobname_a4']
+    job.args[:] = [JobArg('argument6', 'a6', None),
+                   JobArg('argument7', 'a7', None)]
+    assert job._get_expanded_node_names() == ['jobname_a6', 'jobname_a7']
@@ -0,0 +1,123 @@
+import os
+import pickle
+import shutil
+import pytest
+
+from pycondor import Job, Dagman
+from pycondor.serialize import FORMAT_VERSION
+
+here = os.path.abspath(os.path.dirname(__file__))
+example_script = os.path.join(here, 'example_script.py')
+
+
+@pytest.mark.parametrize('make_dagman', ['mixed'], indirect=True)
+def test_save_load(tmpdir, make_dagman, read_files):
+    submit_dir = str(tmpdir.join('submit'))
+    path = str(tmpdir.join('dagman.pkl'))
+    dagman = make_dagman(submit_dir)
+    dagman.save(path)
+    dagman.build(fancyname=False)
+    expected = read_files(submit_dir)
+    shutil.rmtree(submit_dir)
+
+    loaded = Dagman.load(path)
+    assert isinstance(loaded, Dagman)
+    assert [node.name for node in loaded] == ['job_1', 'job_2', 'subdag']
+    assert loaded['job_1'].args == dagman['job_1'].args
+    assert loaded['job_2'].parents == [loaded['job_1']]
+    assert loaded['job_1'].children == [loaded['job_2'], loaded['subdag']]
+    assert loaded['subdag']['sub_job_2'].parents == \
+        [loaded['subdag']['sub_job_1']]
+    assert loaded['subdag'].dag is loaded
+    assert loaded['subdag'].splice
+    assert not loaded._built
+    assert loaded._logger is None
+
+    loaded.build(fancyname=False)
+    assert read_files(submit_dir) == expected
+
+
+@pytest.mark.parametrize('make_dagman', ['mixed'], indirect=True)
+def test_load_modify_and_build(tmpdir, make_dagman):
+    submit_dir = str(tmpdir.join('submit'))
+    path = str(tmpdir.join('dagman.pkl'))
+    make_dagman(submit_dir).save(path)
+
+    loaded = Dagman.load(path)
+    new_job = Job('job_3', example_script, submit=submit_dir, dag=loaded)
+    new_job.add_parent(loaded['job_2'])
+    loaded.build(fancyname=False)
+    with open(loaded.submit_file, 'r') as f:
+        assert 'Parent job_2 Child job_3' in f.read().split('\n')
+
+
+def test_save_bad_attribute_raises(tmpdir):
+    dagman = Dagman('dagman', submit=str(tmpdir))
+    job = Job('job', example_script, dag=dagman)
+    job.custom = object()
+    with pytest.raises(TypeError) as excinfo:
+        dagman.save(str(tmpdir.join('dagman.pkl')))
+    assert 'Cannot save attribute custom of job' in str(excinfo.value)
+
+
+def test_load_rejects_objects(tmpdir):
+    path = str(tmpdir.join('dagman.pkl'))
+    with open(path, 'wb') as f:
+        pickle.dump({'format': 'pycondor-dagman', 'attrs': os.system}, f)
+    with pytest.raises(ValueError) as excinfo:
+        Dagman.load(path)
+    assert 'is not a saved Dagman file' in str(excinfo.value)
+    assert isinstance(excinfo.value.__cause__, pickle.UnpicklingError)
+
+
+def test_load_newer_version_raises(tmpdir):
+    path = str(tmpdir.join('dagman.pkl'))
+    with open(path, 'wb') as f:
+        pickle.dump({'format': 'pycondor-dagman',
+                     'version': FORMAT_VERSION + 1}, f)
+    with pytest.raises(ValueError) as excinfo:
+        Dagman.load(path)
+    assert 'newer version of pycondor' in str(excinfo.value)
+
+
+def test_load_older_version_raises(tmpdir):
+    path = str(tmpdir.join('dagman.pkl'))
+    with open(path, 'wb') as f:
+        pickle.dump({'format': 'pycondor-dagman',
+                     'version': FORMAT_VERSION - 1}, f)
+    with pytest.raises(ValueError) as excinfo:
+        Dagman.load(path)
+    assert 'unsupported older format' in str(excinfo.value)
+
+
+def test_save_columns(tmpdir):
+    path = str(tmpdir.join('dagman.pkl'))
+    dagman = Dagman('dagman', submit=str(tmpdir))
+    extra_lines = ['+Group = "a"']
+    for i in range(300):
+        job = Job('job_{}'.format(i), example_script, dag=dagman,
+                  request_memory='{}GB'.format(i % 2),
+                  extra_lines=extra_lines if i % 3 else ['+Group = "b"'])
+        job.add_arg('--seed {}'.format(i % 5))
+    dagman.save(path)
+
+    with open(path, 'rb') as f:
+        data = pickle.load(f)
+    [(kind, attr_names, _, columns)] = [group for group in data['groups']
+                                        if group[0] == 'J']
+    tables = {attr: column[0] for attr, column in zip(attr_names, columns)}
+    # Each distinct value is stored once, with no indices if it is the only
+    # one in its column
+    assert len(tables['name']) == 300
+    assert tables['request_memory'] == ['0GB', '1GB']
+    assert columns[attr_names.index('executable')][2] is None
+    # Unhashable values are only shared if they were the same object
+    assert len(tables['extra_lines']) == 101
+
+    loaded = Dagman.load(path)
+    assert [job.request_memory for job in loaded] == \
+        [job.request_memory for job in dagman]
+    assert [job.extra_lines for job in loaded] == \
+        [job.extra_lines for job in dagman]
+    assert loaded['job_1'].extra_lines is loaded['job_2'].extra_lines
+    assert [job.args for job in loaded] == [job.args for job in dagman]
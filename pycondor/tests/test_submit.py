@@ -0,0 +1,518 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import subprocess
+import threading
+import types
+import pytest
+import pycondor
+from pycondor import Job, Dagman, submit
+from pycondor.utils import clear_pycondor_environment_variables
+
+clear_pycondor_environment_variables()
+
+here = os.path.abspath(os.path.dirname(__file__))
+example_script = os.path.join(here, 'example_script.py')
+
+
+class FakeSubmit(object):
+
+    def __init__(self, description):
+        self.description = description
+        self.dag_file = None
+
+    @classmethod
+    def from_dag(cls, dag_file):
+        submit = cls('')
+        submit.dag_file = dag_file
+        return submit
+
+
+class FakeSubmitResult(object):
+
+    def __init__(self, cluster, num_procs):
+        self._cluster = cluster
+        self._num_procs = num_procs
+
+    def cluster(self):
+        return self._cluster
+
+    def num_procs(self):
+        return self._num_procs
+
+
+class FakeSchedd(object):
+
+    n_connections = 0
+
+    def __init__(self):
+        FakeSchedd.n_connections += 1
+        self.submitted = []
+
+    def submit(self, description):
+        self.submitted.append(description)
+        return FakeSubmitResult(100 + len(self.submitted), 1)
+
+
+@pytest.fixture()
+def fake_htcondor(monkeypatch):
+    # Installs a fake htcondor module, with a fresh Schedd connection
+    htcondor = types.ModuleType('htcondor')
+    htcondor.Schedd = FakeSchedd
+    htcondor.Submit = FakeSubmit
+    htcondor.version = lambda: '$CondorVersion: 8.8.0 Jan 01 2019 $'
+    monkeypatch.setitem(sys.modules, 'htcondor', htcondor)
+    FakeSchedd.n_connections = 0
+    submit.set_schedd(None)
+    yield htcondor
+    submit.set_schedd(None)
+
+
+@pytest.fixture()
+def no_htcondor(monkeypatch):
+    # Makes importing htcondor fail
+    monkeypatch.setitem(sys.modules, 'htcondor', None)
+    submit.set_schedd(None)
+
+
+@pytest.fixture()
+def fake_popen(monkeypatch):
+    # Records condor commands instead of running them
+    commands = []
+
+    class FakePopen(object):
+        returncode = 0
+
+        def __init__(self, command, **kwargs):
+            commands.append(command)
+
+        def communicate(self):
+            return b'1 job(s) submitted to cluster 7.\n', b''
+
+    monkeypatch.setattr(shutil, 'which', lambda x: 'submit_exists.exe')
+    monkeypatch.setattr(subprocess, 'Popen', FakePopen)
+    return commands
+
+
+def test_submit_job_bindings(tmpdir, fake_htcondor, fake_popen, capsys):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(3)]
+    for job in jobs:
+        job.build(fancyname=False)
+        job.submit_job()
+
+    # A single Schedd connection is used for all submissions
+    assert FakeSchedd.n_connections == 1
+    schedd = submit.get_schedd()
+    descriptions = []
+    for job in jobs:
+        with open(job.submit_file, 'r') as f:
+            descriptions.append(f.read())
+    assert [s.description for s in schedd.submitted] == descriptions
+    assert fake_popen == []
+    assert '1 job(s) submitted to cluster 103.' in capsys.readouterr().out
+
+
+def test_submit_dag_bindings(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    dagman.build_submit(fancyname=False)
+
+    schedd = submit.get_schedd()
+    assert len(schedd.submitted) == 1
+    assert schedd.submitted[0].dag_file == dagman.submit_file
+    assert fake_popen == []
+
+
+def test_set_schedd(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    schedd = FakeSchedd()
+    submit.set_schedd(schedd)
+    job = Job('job', example_script, submit=submit_dir)
+    job.build_submit(fancyname=False)
+    assert submit.get_schedd() is schedd
+    assert len(schedd.submitted) == 1
+
+
+def test_submit_options_use_command(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.build(fancyname=False)
+    job.submit_job(submit_options='-maxjobs 10')
+    assert fake_popen == [['condor_submit', '-maxjobs', '10',
+                           job.submit_file]]
+
+    with pytest.raises(ValueError):
+        job.submit_job(submit_options='-maxjobs 10', use_bindings=True)
+
+
+def test_submit_without_bindings(tmpdir, no_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.build(fancyname=False)
+    job.submit_job()
+    assert fake_popen == [['condor_submit', job.submit_file]]
+    assert submit.get_schedd() is None
+
+    with pytest.raises(ImportError):
+        job.submit_job(use_bindings=True)
+
+
+def test_submit_use_bindings_false(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.build(fancyname=False)
+    job.submit_job(use_bindings=False)
+    assert fake_popen == [['condor_submit', job.submit_file]]
+    assert FakeSchedd.n_connections == 0
+
+
+@pytest.fixture()
+def fake_submit_command(monkeypatch):
+    # Mimics condor_submit, which submits a single submit file, giving each
+    # submit file its own cluster. Returns the commands run and the cluster
+    # of each submit file.
+    commands = []
+    clusters = {}
+    lock = threading.Lock()
+
+    class FakePopen(object):
+        returncode = 0
+
+        def __init__(self, command, **kwargs):
+            with lock:
+                commands.append(command)
+                self.cluster = 10 * len(commands)
+                clusters[command[-1]] = self.cluster
+
+        def communicate(self):
+            out = ('Submitting job(s).\n'
+                   '1 job(s) submitted to cluster {}.\n'.format(self.cluster))
+            return out.encode('utf-8'), b''
+
+    monkeypatch.setattr(shutil, 'which', lambda x: 'submit_exists.exe')
+    monkeypatch.setattr(subprocess, 'Popen', FakePopen)
+    return commands, clusters
+
+
+def test_submit_jobs_command(tmpdir, no_htcondor, fake_submit_command):
+    commands, clusters = fake_submit_command
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(20)]
+    cluster_ids = pycondor.submit_jobs(jobs, fancyname=False)
+
+    assert all(job._built for job in jobs)
+    # One condor_submit command per submit file
+    assert sorted(commands) == sorted(['condor_submit', job.submit_file]
+                                      for job in jobs)
+    assert cluster_ids == [clusters[job.submit_file] for job in jobs]
+    assert len(set(cluster_ids)) == 20
+
+
+def test_submit_jobs_bindings(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job', example_script, submit=submit_dir) for i in range(3)]
+    cluster_ids = pycondor.submit_jobs(jobs)
+
+    # Fancy names are unique across the Jobs built together
+    assert len(set(job.submit_file for job in jobs)) == 3
+    assert cluster_ids == [101, 102, 103]
+    assert FakeSchedd.n_connections == 1
+    assert fake_popen == []
+
+
+def test_submit_jobs_failure(tmpdir, no_htcondor, monkeypatch):
+    class FailingPopen(object):
+
+        def __init__(self, command, **kwargs):
+            self.fail = command[-1].endswith('job_1.submit')
+            self.returncode = 1 if self.fail else 0
+
+        def communicate(self):
+            if self.fail:
+                return (b'Submitting job(s)\n',
+                        b'ERROR: Failed to parse submit file\n')
+            return b'1 job(s) submitted to cluster 5.\n', b''
+
+    monkeypatch.setattr(shutil, 'which', lambda x: 'submit_exists.exe')
+    monkeypatch.setattr(subprocess, 'Popen', FailingPopen)
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(3)]
+    with pytest.raises(RuntimeError) as excinfo:
+        pycondor.submit_jobs(jobs, fancyname=False)
+    assert 'failed for 1 of 3 Jobs' in str(excinfo.value)
+    assert jobs[1].submit_file in str(excinfo.value)
+    assert 'Failed to parse submit file' in str(excinfo.value)
+    # The other Jobs are still submitted, with their own results
+    assert [job.submit_result.cluster_id for job in jobs] == [5, None, 5]
+    assert jobs[1].submit_result.returncode == 1
+
+
+class FailingSchedd(FakeSchedd):
+    # Fails to submit the second submit description
+
+    def submit(self, description):
+        if len(self.submitted) == 1:
+            self.submitted.append(None)
+            raise RuntimeError('Failed to submit')
+        return super(FailingSchedd, self).submit(description)
+
+
+def test_submit_jobs_bindings_failure(tmpdir, fake_htcondor, fake_popen,
+                                      capsys):
+    submit.set_schedd(FailingSchedd())
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(3)]
+    with pytest.raises(RuntimeError) as excinfo:
+        pycondor.submit_jobs(jobs, fancyname=False)
+    assert 'the Python bindings failed for 1 of 3 Jobs' in \
+        str(excinfo.value)
+    assert jobs[1].submit_file in str(excinfo.value)
+    assert 'RuntimeError: Failed to submit' in str(excinfo.value)
+    # The other Jobs are still submitted, with their own results
+    assert [job.submit_result.cluster_id for job in jobs] == [101, None, 103]
+    assert jobs[1].submit_result.returncode == 1
+    assert '1 job(s) submitted to cluster 103.' in capsys.readouterr().out
+    assert fake_popen == []
+
+
+def test_submit_jobs_raises(tmpdir):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job_1 = Job('job_1', example_script, submit=submit_dir)
+    job_2 = Job('job_2', example_script, submit=submit_dir)
+    with pytest.raises(ValueError):
+        pycondor.submit_jobs([job_1, job_1])
+    job_1.add_child(job_2)
+    with pytest.raises(ValueError):
+        pycondor.submit_jobs([job_1])
+    with pytest.raises(TypeError):
+        pycondor.submit_jobs([Dagman('dagman')])
+
+
+def test_submit_job_result(tmpdir, no_htcondor, fake_submit_command):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.build(fancyname=False)
+    result = job.submit_job()
+
+    assert isinstance(result, pycondor.SubmitResult)
+    assert result.cluster_id == 10
+    assert result.n_procs == 1
+    assert result.returncode == 0
+    assert result.stderr == ''
+    assert job.submit_result is result
+
+
+def test_submit_dag_result_bindings(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    dagman.build(fancyname=False)
+    result = dagman.submit_dag()
+
+    assert result == pycondor.SubmitResult(
+        101, 1, 0, '1 job(s) submitted to cluster 101.', '')
+    assert dagman.submit_result is result
+
+
+def test_submit_job_result_failure(tmpdir, no_htcondor, monkeypatch):
+    class FailingPopen(object):
+        returncode = 1
+
+        def __init__(self, command, **kwargs):
+            pass
+
+        def communicate(self):
+            return b'Submitting job(s)\n', b'ERROR: Parse error\n'
+
+    monkeypatch.setattr(shutil, 'which', lambda x: 'submit_exists.exe')
+    monkeypatch.setattr(subprocess, 'Popen', FailingPopen)
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.build(fancyname=False)
+    result = job.submit_job()
+
+    assert result.cluster_id is None
+    assert result.n_procs == 0
+    assert result.returncode == 1
+    assert result.stderr == 'ERROR: Parse error\n'
+
+
+def test_submit_jobs_stores_results(tmpdir, no_htcondor,
+                                    fake_submit_command):
+    commands, clusters = fake_submit_command
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(3)]
+    pycondor.submit_jobs(jobs, fancyname=False)
+    assert [job.submit_result.cluster_id for job in jobs] == \
+        [clusters[job.submit_file] for job in jobs]
+    assert all(job.submit_result.n_procs == 1 for job in jobs)
+    assert all('cluster {}.'.format(job.submit_result.cluster_id)
+               in job.submit_result.stdout for job in jobs)
+
+
+def test_parse_command_output():
+    out = ('Submitting job(s)..........\n'
+           '10 job(s) submitted to cluster 1234.\n')
+    assert submit._command_result(0, out, '') == \
+        submit.SubmitResult(1234, 10, 0, out, '')
+
+
+@pytest.fixture()
+def condor_submit_script(tmpdir, monkeypatch):
+    # Puts a fake condor_submit script, running the given shell commands,
+    # first on the PATH
+    bin_dir = tmpdir.mkdir('bin')
+
+    def make_script(commands):
+        script = bin_dir.join('condor_submit')
+        script.write('#!/bin/sh\n{}\n'.format(commands))
+        script.chmod(0o755)
+
+    monkeypatch.setenv('PATH', '{}{}{}'.format(bin_dir, os.pathsep,
+                                               os.environ['PATH']))
+    return make_script
+
+
+@pytest.fixture()
+def built_job(tmpdir):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    job = Job('job', example_script, submit=submit_dir)
+    job.build(fancyname=False)
+    return job
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Uses a shell script')
+def test_submit_job_async(built_job, no_htcondor, condor_submit_script):
+    condor_submit_script('echo "3 job(s) submitted to cluster 42."')
+    result = asyncio.run(built_job.submit_job_async())
+    assert result.cluster_id == 42
+    assert result.n_procs == 3
+    assert built_job.submit_result is result
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Uses a shell script')
+def test_submit_job_async_timeout(built_job, no_htcondor,
+                                  condor_submit_script):
+    condor_submit_script('exec sleep 10')
+    start = time.time()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(built_job.submit_job_async(timeout=0.2))
+    assert time.time() - start < 5
+    assert built_job.submit_result is None
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Uses a shell script')
+def test_submit_job_async_cancel(built_job, no_htcondor,
+                                 condor_submit_script):
+    condor_submit_script('exec sleep 10')
+
+    async def submit_and_cancel():
+        task = asyncio.ensure_future(built_job.submit_job_async())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await task
+
+    start = time.time()
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(submit_and_cancel())
+    assert time.time() - start < 5
+
+
+class SlowSchedd(FakeSchedd):
+    # Records the largest number of submissions in flight at once
+
+    def __init__(self):
+        super(SlowSchedd, self).__init__()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def submit(self, description):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+            return super(SlowSchedd, self).submit(description)
+
+
+@pytest.mark.parametrize('use_default', [True, False])
+def test_submit_async_semaphore(tmpdir, fake_htcondor, monkeypatch,
+                                use_default):
+    schedd = SlowSchedd()
+    submit.set_schedd(schedd)
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(8)]
+    for job in jobs:
+        job.build(fancyname=False)
+
+    async def submit_all():
+        semaphore = None
+        if use_default:
+            submit.set_max_concurrent_submissions(2)
+        else:
+            semaphore = asyncio.Semaphore(2)
+        return await asyncio.gather(*[job.submit_job_async(
+            semaphore=semaphore) for job in jobs])
+
+    monkeypatch.setattr(submit, '_max_concurrent_submissions', 8)
+    results = asyncio.run(submit_all())
+    assert sorted(result.cluster_id for result in results) == \
+        list(range(101, 109))
+    assert schedd.max_in_flight == 2
+
+
+def test_set_max_concurrent_submissions_in_flight(tmpdir, fake_htcondor,
+                                                 monkeypatch):
+    # Changing the limit while submissions are in flight must not let more
+    # submissions than the new limit run at the same time
+    schedd = SlowSchedd()
+    submit.set_schedd(schedd)
+    monkeypatch.setattr(submit, '_max_concurrent_submissions', 2)
+    submit_dir = str(tmpdir.mkdir('submit'))
+    jobs = [Job('job_{}'.format(i), example_script, submit=submit_dir)
+            for i in range(8)]
+    for job in jobs:
+        job.build(fancyname=False)
+
+    async def submit_all():
+        first = [asyncio.ensure_future(job.submit_job_async())
+                 for job in jobs[:4]]
+        await asyncio.sleep(0.01)
+        submit.set_max_concurrent_submissions(3)
+        second = [job.submit_job_async() for job in jobs[4:]]
+        return await asyncio.gather(*(first + second))
+
+    results = asyncio.run(submit_all())
+    assert sorted(result.cluster_id for result in results) == \
+        list(range(101, 109))
+    assert schedd.max_in_flight == 3
+
+
+def test_set_max_concurrent_submissions_raises():
+    with pytest.raises(ValueError):
+        submit.set_max_concurrent_submissions(0)
+
+
+def test_submit_dag_async_bindings(tmpdir, fake_htcondor, fake_popen):
+    submit_dir = str(tmpdir.mkdir('submit'))
+    dagman = Dagman('dagman', submit=submit_dir)
+    Job('job', example_script, submit=submit_dir, dag=dagman)
+    dagman.build(fancyname=False)
+    result = asyncio.run(dagman.submit_dag_async(timeout=10))
+
+    assert result.cluster_id == 101
+    assert dagman.submit_result is result
+    assert submit.get_schedd().submitted[0].dag_file == dagman.submit_file
+    assert fake_popen == []
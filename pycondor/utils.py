@@ -66,7 +66,8 @@ def checkdir(path, makedirs):
         if makedirs:
             print('The directory {} doesn\'t exist, '.format(outdir)
                   + 'creating it...')
-            os.makedirs(outdir)
+            # exist_ok in case another build thread created it in the meantime
+            os.makedirs(outdir, exist_ok=True)
         else:
             raise IOError('The directory {} doesn\'t exist'.format(outdir))
     return